@@ -1,16 +1,52 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
-import httpx
+import hashlib
 import json
 import os
-import uuid
-import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 import asyncio
 import logging
-import glob
-from git import Repo
-from qdrant_client import QdrantClient, models
+import time
+from qdrant_client import models
+
+from collection import LEXICAL_VECTOR, get_collection_profile, has_lexical_vectors, qdrant_client, search_params
+from config import (
+    COLLECTION_NAME,
+    HYBRID_PREFETCH_MULTIPLIER,
+    INDEXER_INTERVAL,
+    INDEXER_POLL_INTERVAL,
+    INDEXING_IN_API,
+    QUERY_CACHE_REDIS_URL,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    RERANK_CANDIDATES,
+    RERANK_MAX_CONCURRENCY,
+    RERANK_TIMEOUT_MS,
+    RERANKER,
+    RERANKER_MODEL,
+    RERANKER_URL,
+    SEARCH_MODE,
+)
+from embedder import (
+    EmbeddingModel,
+    check_embedder_available,
+    close_embedder_client,
+    embed_snippets,
+    embedding_models,
+    ensure_model_collection,
+    get_embedder_client,
+    get_embedding_model,
+    get_embeddings,
+    iter_embedding_batches,
+    open_embedder_client,
+)
+from extraction import read_snippet_code, repository_info, repository_path
+from indexing import index_state, load_repository_names, run_indexing_worker
+from lexical import query_sparse_vector
+from metrics import HTTP_IN_PROGRESS, QDRANT_LATENCY, RERANK_FALLBACKS, RERANK_LATENCY, SEARCH_LATENCY
+from query_cache import QueryEmbeddingCache, RedisEmbeddingStore, normalize_query
+from reranking import create_reranker
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -18,162 +54,9 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Code Search API", description="Search code across repositories using vector embeddings")
 
-# Configuration
-QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
-EMBEDDER_URL = os.getenv("EMBEDDER_URL", "http://embedder:8000/v1/embeddings")
-COLLECTION_NAME = "code-search"
-REPOS_DIR = "./data/semantic_search/repos"
-CONFIG_FILE = os.getenv("CONFIG_PATH", "repos_config.json")
-
-# Create necessary directories
-os.makedirs(REPOS_DIR, exist_ok=True)
-
-# Background indexing state
-indexing_status = {"status": "not_started", "total_docs": 0, "error": None}
-
-async def clone_repository(repo_name: str) -> str:
-    """Clone a GitHub repository"""
-    repo_url = f"https://github.com/{repo_name}.git"
-    repo_path = os.path.join(REPOS_DIR, repo_name.replace("/", "_"))
-    
-    if os.path.exists(repo_path):
-        logger.info(f"Repository {repo_name} already exists at {repo_path}")
-        return repo_path
-    
-    logger.info(f"Cloning {repo_name} to {repo_path}")
-    os.makedirs(os.path.dirname(repo_path), exist_ok=True)
-    Repo.clone_from(repo_url, repo_path)
-    return repo_path
-
-def extract_code_snippets(repo_path: str, repo_name: str) -> List[Dict[str, Any]]:
-    """Extract code snippets from a repository"""
-    snippets = []
-    
-    code_extensions = ['.py', '.js', '.ts', '.java', '.cpp', '.hpp', '.h', '.c', '.cs', '.go', '.rs', '.php', '.rb']
-    
-    for ext in code_extensions:
-        files = glob.glob(f"{repo_path}/**/*{ext}", recursive=True)
-        
-        for file_path in files:
-            rel_path = os.path.relpath(file_path, repo_path)
-            
-            if any(d in rel_path.split(os.sep) for d in ['__pycache__', 'node_modules', '.git']):
-                continue
-                
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                lines = content.split('\n')
-                chunk_size = 100
-                for i in range(0, len(lines), chunk_size):
-                    chunk = '\n'.join(lines[i:i+chunk_size])
-                    if not chunk.strip():
-                        continue
-                        
-                    snippets.append({
-                        "id": str(uuid.uuid4()),
-                        "code": chunk,
-                        "file_path": rel_path,
-                        "line_from": i + 1,
-                        "line_to": min(i + chunk_size, len(lines)),
-                        "repo": {
-                            "name": repo_name,
-                            "path": repo_path,
-                            "url": f"github.com/{repo_name}"
-                        }
-                    })
-            except Exception as e:
-                logger.error(f"Error processing file {file_path}: {e}")
-    
-    return snippets
+# Indexing runs in the separate indexer worker (indexer.py); INDEXING_IN_API runs it in this process instead
+indexing_task: Optional[asyncio.Task] = None
 
-async def process_repositories():
-    """Background task to process and index repositories"""
-    global indexing_status
-
-    # Check if collection already has data
-    try:
-        collection_info = qdrant_client.get_collection(COLLECTION_NAME)
-        if collection_info.points_count > 0:
-            logger.info(f"Collection already contains {collection_info.points_count} points. Skipping indexing.")
-            indexing_status["status"] = "completed"
-            indexing_status["total_docs"] = collection_info.points_count
-            return
-    except Exception as e:
-        logger.error(f"Error checking collection: {e}")
-    
-    try:
-        # Wait for embedder to be ready (no timeout)
-        indexing_status["status"] = "waiting_for_embedder"
-        while True:
-            try:
-                if await check_embedder_available():
-                    logger.info("Embedder service is available")
-                    break
-            except Exception as e:
-                logger.info("Waiting for embedder service...")
-            await asyncio.sleep(5)
-
-        indexing_status["status"] = "indexing"
-        
-        # Load config
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-        
-        # Process each repository
-        for repo_config in config['repos']:
-            if repo_config['type'] == 'github':
-                for repo_name in repo_config['repos']:
-                    try:
-                        # Clone repository
-                        repo_path = await clone_repository(repo_name)
-                        
-                        # Extract code snippets
-                        logger.info(f"Extracting code from {repo_name}")
-                        snippets = extract_code_snippets(repo_path, repo_name)
-                        logger.info(f"Found {len(snippets)} code snippets in {repo_name}")
-                        
-                        # Index snippets in batches
-                        batch_size = 50
-                        for i in range(0, len(snippets), batch_size):
-                            batch = snippets[i:i+batch_size]
-                            
-                            points = []
-                            for snippet in batch:
-                                try:
-                                    # Get embedding
-                                    embedding = await get_embedding(snippet["code"])
-                                    
-                                    # Create point
-                                    point = models.PointStruct(
-                                        id=snippet["id"],
-                                        vector=embedding,
-                                        payload=snippet
-                                    )
-                                    points.append(point)
-                                    
-                                except Exception as e:
-                                    logger.error(f"Error processing snippet: {e}")
-                            
-                            if points:
-                                qdrant_client.upsert(
-                                    collection_name=COLLECTION_NAME,
-                                    points=points,
-                                    wait=True
-                                )
-                                indexing_status["total_docs"] += len(points)
-                                
-                    except Exception as e:
-                        logger.error(f"Error processing repository {repo_name}: {e}")
-        
-        indexing_status["status"] = "completed"
-        
-    except Exception as e:
-        logger.error(f"Indexing error: {e}")
-        indexing_status["status"] = "error"
-        indexing_status["error"] = str(e)
 
 # Data models
 class Repository(BaseModel):
@@ -193,155 +76,233 @@ class SearchQuery(BaseModel):
     query: str
     top_n: int = 10
     allowed_repos: Optional[List[str]] = None
+    # HNSW beam width for this query: higher is more accurate and slower (Qdrant default is ef_construct)
+    hnsw_ef: Optional[int] = None
+    # Embedding model (and so collection) to search, defaults to EMBEDDING_MODEL
+    model: Optional[str] = None
+    # "vector" ranks by embedding similarity, "hybrid" fuses it with lexical (BM25) matches; defaults to SEARCH_MODE
+    mode: Optional[Literal["vector", "hybrid"]] = None
+    # Rerank RERANK_CANDIDATES candidates down to top_n; defaults to on when a RERANKER is configured
+    rerank: Optional[bool] = None
     
 class SearchResult(BaseModel):
     snippets: List[CodeSnippet]
 
+class BatchSearchQuery(BaseModel):
+    queries: List[SearchQuery]
+
+class BatchSearchResult(BaseModel):
+    results: List[SearchResult]
+
 class ServiceStatus(BaseModel):
     status: str
     error: Optional[str] = None
 
+class RepositoryProgress(BaseModel):
+    name: str
+    commit: str
+    state: str
+    files_total: int
+    files_done: int
+    chunks: int
+    # Rates and ETA of the current run of an indexing repository
+    chunks_per_sec: Optional[float] = None
+    eta_seconds: Optional[float] = None
+
 class IndexStatus(BaseModel):
     status: str
     total_docs: Optional[int] = None
+    # Chunks of the last indexing run the embedder rejected, they are not searchable
+    skipped_chunks: int = 0
     error: Optional[str] = None
+    repositories: List[RepositoryProgress] = []
+
+class IndexVersion(BaseModel):
+    version: str
+    commits: Dict[str, str]
+
+class CacheStatus(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    shared_hits: int
+    misses: int
+    hit_rate: float
 
 class SystemStatus(BaseModel):
     status: str
     embedder: ServiceStatus
     qdrant: ServiceStatus
     index: IndexStatus
+    query_cache: Optional[CacheStatus] = None
     
-# Global client
-qdrant_client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+class ReindexRequest(BaseModel):
+    repos: Optional[List[str]] = None
+    # Reindex from scratch, even repositories already indexed at their current commit
+    force: bool = False
 
-# Initialize collection
-def ensure_collection_exists():
-    try:
-        collections = qdrant_client.get_collections().collections
-        collection_names = [c.name for c in collections]
-        
-        if COLLECTION_NAME not in collection_names:
-            logger.info(f"Creating collection {COLLECTION_NAME}")
-            qdrant_client.create_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=models.VectorParams(
-                    size=1536,  # Update this to match the embedder's output size
-                    distance=models.Distance.COSINE
-                )
-            )
-    except Exception as e:
-        logger.error(f"Failed to create collection: {e}")
-        raise
+class ReindexJob(BaseModel):
+    id: int
+    state: str
+    repos: Optional[List[str]] = None
+    force: bool = False
+    error: Optional[str] = None
 
-async def check_embedder_available() -> bool:
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                EMBEDDER_URL,
-                json={
-                    "input": "test",
-                    "model": "Qodo/Qodo-Embed-1-1.5B"
-                },
-                timeout=5.0
-            )
-            if response.status_code == 200 and "data" in response.json():
-                return True
-            return False
-    except Exception:
-        return False
+# Storage profile of the collection, decides whether quantized results are rescored
+collection_profile = get_collection_profile()
+
+# Cache of query embeddings for /search
+query_cache = QueryEmbeddingCache(
+    max_size=QUERY_CACHE_SIZE,
+    ttl=QUERY_CACHE_TTL,
+    shared=RedisEmbeddingStore(QUERY_CACHE_REDIS_URL, ttl=QUERY_CACHE_TTL) if QUERY_CACHE_REDIS_URL else None
+)
+
+# Reranker of search candidates (RERANKER), created on startup; None disables reranking
+reranker = None
+# Searches arriving while every slot is busy skip reranking instead of waiting for it
+rerank_slots = asyncio.Semaphore(RERANK_MAX_CONCURRENCY)
 
 @app.on_event("startup")
 async def startup():
-    # Initialize collection
-    ensure_collection_exists()
+    global indexing_task, reranker
+    open_embedder_client()
+    # The HTTP reranker shares the embedder's connection pool
+    reranker = create_reranker(RERANKER, RERANKER_URL, RERANKER_MODEL, get_embedder_client())
     
-    # Check if collection is already populated
-    try:
-        collection_info = qdrant_client.get_collection(COLLECTION_NAME)
-        if collection_info.points_count > 0:
-            logger.info(f"Collection {COLLECTION_NAME} already contains {collection_info.points_count} points. Skipping indexing.")
-            global indexing_status
-            indexing_status["status"] = "completed"
-            indexing_status["total_docs"] = collection_info.points_count
-            return
-    except Exception as e:
-        logger.error(f"Error checking collection: {e}")
+    # Initialize collections; a missing one is created here if its embedder is already up, otherwise by the indexer
+    for model in embedding_models.values():
+        await ensure_model_collection(model)
     
-    # Start background indexing task only if collection is empty
-    asyncio.create_task(process_repositories())
+    if INDEXING_IN_API:
+        # Single-process deployment: index in the background and serve /reindex jobs here
+        indexing_task = asyncio.create_task(run_indexing_worker(interval=INDEXER_INTERVAL, poll_interval=INDEXER_POLL_INTERVAL))
+
+# Endpoints whose end-to-end latency is recorded, including request parsing and serialization
+SEARCH_ENDPOINTS = {"/search", "/search/batch"}
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    with HTTP_IN_PROGRESS.track_inprogress():
+        if request.url.path not in SEARCH_ENDPOINTS:
+            return await call_next(request)
+        with SEARCH_LATENCY.labels(request.url.path).time():
+            return await call_next(request)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if indexing_task is not None:
+        indexing_task.cancel()
+    await close_embedder_client()
+    await query_cache.close()
+    await qdrant_client.close()
 
 
-# Get embeddings from vllm service
-async def get_embedding(text: str) -> List[float]:
-    instruction = "Instruct: Given Code or Text, retrieval relevant content\nQuery: "
-    prompt = f"{instruction}{text}" if "query" in text else text
+async def get_query_embeddings(queries: List[str], model: EmbeddingModel) -> List[List[float]]:
+    """
+    Embed search queries, reusing embeddings of recently seen queries.
+    All queries missing from the cache are embedded in a single embedder request.
+    """
+    queries = [normalize_query(query) for query in queries]
+    # Embeddings of different models must never be mixed up in the cache
+    keys = [f"{model.name}\0{query}" for query in queries]
+    
+    embeddings = {}
+    for key in dict.fromkeys(keys):
+        embedding = await query_cache.get(key)
+        if embedding is not None:
+            embeddings[key] = embedding
     
+    missing = {key: query for key, query in zip(keys, queries) if key not in embeddings}
+    if missing:
+        for key, embedding in zip(missing, await get_embeddings([f"query: {query}" for query in missing.values()], model)):
+            embeddings[key] = embedding
+            await query_cache.set(key, embedding)
+    
+    return [embeddings[key] for key in keys]
+
+async def get_query_embedding(query: str, model: EmbeddingModel) -> List[float]:
+    return (await get_query_embeddings([query], model))[0]
+
+def to_repository_progress(progress: Dict[str, Any]) -> RepositoryProgress:
+    repository = RepositoryProgress(
+        name=progress["repo_name"],
+        commit=progress["commit_sha"],
+        state=progress["state"],
+        files_total=progress["files_total"],
+        files_done=progress["files_done"],
+        chunks=progress["chunks"]
+    )
+    elapsed = time.time() - progress["started_at"]
+    if repository.state == "indexing" and elapsed > 0:
+        repository.chunks_per_sec = round((progress["chunks"] - progress["run_chunks_start"]) / elapsed, 1)
+        files_per_sec = (progress["files_done"] - progress["run_files_start"]) / elapsed
+        if files_per_sec > 0:
+            repository.eta_seconds = round((progress["files_total"] - progress["files_done"]) / files_per_sec)
+    return repository
+
+def resolve_model(name: Optional[str]) -> EmbeddingModel:
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                EMBEDDER_URL,
-                json={
-                    "input": prompt,
-                    "model": "Qodo/Qodo-Embed-1-1.5B"
-                },
-                timeout=60.0
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Embedding API error: Status={response.status_code}, Response={response.text}")
-                raise HTTPException(status_code=500, detail=f"Embedding service error: {response.text}")
-                
-            result = response.json()
-            return result["data"][0]["embedding"]
-            
-    except Exception as e:
-        logger.error(f"Failed to get embedding: {e}")
-        raise HTTPException(status_code=500, detail=f"Embedding error: {str(e)}")
+        return get_embedding_model(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # API endpoints
 @app.post("/index")
-async def index_code(snippets: List[CodeSnippet]):
+async def index_code(snippets: List[CodeSnippet], model: Optional[str] = Query(None, description="Embedding model, defaults to EMBEDDING_MODEL")):
     """
     Index code snippets from repositories
     """
+    embedding_model = resolve_model(model)
+    if not await ensure_model_collection(embedding_model):
+        raise HTTPException(status_code=503, detail=f"Collection of {embedding_model.name} is not available yet")
     points = []
     
-    for snippet in snippets:
-        try:
-            # Get embedding for the code
-            embedding = await get_embedding(snippet.code)
-            
-            # Create point
-            point = models.PointStruct(
-                id=snippet.id,
-                vector=embedding,
-                payload={
-                    "code": snippet.code,
-                    "file_path": snippet.file_path,
-                    "line_from": snippet.line_from,
-                    "line_to": snippet.line_to,
-                    "repo": {
-                        "name": snippet.repo.name,
-                        "path": snippet.repo.path,
-                        "url": snippet.repo.url
-                    }
-                }
-            )
-            points.append(point)
-            
-        except Exception as e:
-            logger.error(f"Error processing snippet {snippet.id}: {e}")
+    for batch in iter_embedding_batches(snippet.model_dump() for snippet in snippets):
+        # Snippets posted here may not exist in a local clone, so their code is always kept in the payload
+        points.extend(await embed_snippets(batch, embedding_model, store_code=True))
     
     if points:
-        qdrant_client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=points,
-            wait=True
-        )
+        with QDRANT_LATENCY.labels("upsert").time():
+            await qdrant_client.upsert(
+                collection_name=embedding_model.collection_name,
+                points=points,
+                wait=True
+            )
     
     return {"indexed": len(points)}
 
+@app.post("/reindex", response_model=ReindexJob)
+async def reindex(request: ReindexRequest):
+    """
+    Queue a reindex of the given repositories, or of every configured repository.
+    The job is run by the indexer worker; its progress is reported by /status
+    """
+    if request.repos is not None:
+        # The indexer clones whatever it is given, so only configured repositories are accepted
+        unknown = set(request.repos) - set(await asyncio.to_thread(load_repository_names))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown repositories: {', '.join(sorted(unknown))}")
+    job_id = await asyncio.to_thread(index_state.enqueue_job, COLLECTION_NAME, request.repos, request.force)
+    return ReindexJob(id=job_id, state="queued", repos=request.repos, force=request.force)
+
+@app.get("/reindex/{job_id}", response_model=ReindexJob)
+async def get_reindex_job(job_id: int):
+    job = await asyncio.to_thread(index_state.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Reindex job {job_id} not found")
+    return ReindexJob(id=job["id"], state=job["state"], repos=job["repos"], force=job["force"], error=job["error"])
+
+@app.get("/index/version", response_model=IndexVersion)
+async def get_index_version(model: Optional[str] = Query(None, description="Embedding model, defaults to EMBEDDING_MODEL")):
+    """
+    Version of the indexed corpus: changes whenever a repository is indexed at a new commit.
+    Clients key their caches of search results by it
+    """
+    commits = await asyncio.to_thread(index_state.get_commits, resolve_model(model).collection_name)
+    digest = hashlib.sha256(json.dumps(commits, sort_keys=True).encode("utf-8")).hexdigest()
+    return IndexVersion(version=digest[:16], commits=commits)
+
 @app.get("/status", response_model=SystemStatus)
 async def get_status():
     """Get system status including all components"""
@@ -355,19 +316,25 @@ async def get_status():
     
     # Check Qdrant
     try:
-        collections = qdrant_client.get_collections()
+        await qdrant_client.get_collections()
         qdrant_status = ServiceStatus(status="connected")
     except Exception as e:
         qdrant_status = ServiceStatus(status="error", error=str(e))
     
     # Check index
     try:
-        collection_info = qdrant_client.get_collection(COLLECTION_NAME)
-        # Use global indexing status with more detailed states
+        collection_name = get_embedding_model().collection_name
+        collection_info = await qdrant_client.get_collection(collection_name)
+        # Indexing progress published by the indexer worker
+        indexing_status = await asyncio.to_thread(index_state.load_status, COLLECTION_NAME) or {"status": "not_started"}
+        repositories_progress = await asyncio.to_thread(index_state.load_progress, collection_name)
         index_status = IndexStatus(
             status=indexing_status["status"],
-            total_docs=indexing_status["total_docs"] or collection_info.points_count,
-            error=indexing_status["error"]
+            # Points of the whole collection; chunks indexed by the current run are reported per repository
+            total_docs=collection_info.points_count,
+            skipped_chunks=indexing_status.get("skipped_chunks", 0),
+            error=indexing_status.get("error"),
+            repositories=[to_repository_progress(progress) for progress in repositories_progress]
         )
         if index_status.status == "waiting_for_embedder":
             index_status.error = "Waiting for embedder service to be ready"
@@ -383,58 +350,209 @@ async def get_status():
         status=overall_status,
         embedder=embedder_status,
         qdrant=qdrant_status,
-        index=index_status
+        index=index_status,
+        query_cache=CacheStatus(**query_cache.stats())
     )
 
+def build_search_filter(allowed_repos: Optional[List[str]]) -> Optional[models.Filter]:
+    """Prepare filter if allowed_repos specified"""
+    if not allowed_repos:
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="repo.name",
+                match=models.MatchAny(any=allowed_repos)
+            )
+        ]
+    )
+
+def load_snippet_code(payload: Dict[str, Any]) -> str:
+    """Code of a search result; points indexed with STORE_CODE_IN_PAYLOAD=false are read from the clone"""
+    if "code" in payload:
+        return payload["code"]
+    try:
+        return read_snippet_code(payload["repo"]["name"], payload["file_path"], payload["line_from"], payload["line_to"])
+    except OSError as e:
+        logger.warning(f"Could not read code of {payload['repo']['name']}/{payload['file_path']}: {e}")
+        return ""
+
+def to_search_result(points: List[models.ScoredPoint]) -> SearchResult:
+    snippets = []
+    for result in points:
+        payload = result.payload
+        repo_name = payload["repo"]["name"]
+        snippet = CodeSnippet(
+            id=str(result.id),
+            code=load_snippet_code(payload),
+            file_path=payload["file_path"],
+            line_from=payload["line_from"],
+            line_to=payload["line_to"],
+            # Path and URL stored with the point win over the ones derived from the name
+            repo=Repository(**{**repository_info(repository_path(repo_name), repo_name), **payload["repo"]})
+        )
+        snippets.append(snippet)
+    return SearchResult(snippets=snippets)
+
+async def build_search_results(batch_points: List[List[models.ScoredPoint]]) -> List[SearchResult]:
+    if all("code" in point.payload for points in batch_points for point in points):
+        return [to_search_result(points) for points in batch_points]
+    # Some code has to be read from disk, keep the file reads off the event loop
+    return await asyncio.to_thread(lambda: [to_search_result(points) for points in batch_points])
+
+async def resolve_search_mode(search_query: SearchQuery, model: EmbeddingModel) -> str:
+    mode = search_query.mode or SEARCH_MODE
+    if mode == "hybrid" and not await has_lexical_vectors(model.collection_name):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Collection {model.collection_name} has no lexical vectors, recreate it to enable hybrid search"
+        )
+    return mode
+
+def should_rerank(search_query: SearchQuery) -> bool:
+    return reranker is not None and search_query.rerank is not False
+
+def build_query_request(search_query: SearchQuery, mode: str, query_embedding: List[float]) -> models.QueryRequest:
+    # Reranking needs a wider candidate pool than the results it returns
+    limit = max(search_query.top_n, RERANK_CANDIDATES) if should_rerank(search_query) else search_query.top_n
+    query_filter = build_search_filter(search_query.allowed_repos)
+    params = search_params(collection_profile, search_query.hnsw_ef)
+    lexical_query = query_sparse_vector(search_query.query) if mode == "hybrid" else None
+    
+    if lexical_query is None or not lexical_query.indices:
+        return models.QueryRequest(
+            query=query_embedding,
+            filter=query_filter,
+            params=params,
+            limit=limit,
+            with_payload=True
+        )
+    
+    # Both rankings are over-fetched and fused with reciprocal rank fusion
+    prefetch_limit = limit * HYBRID_PREFETCH_MULTIPLIER
+    return models.QueryRequest(
+        prefetch=[
+            models.Prefetch(query=query_embedding, filter=query_filter, params=params, limit=prefetch_limit),
+            models.Prefetch(query=lexical_query, using=LEXICAL_VECTOR, filter=query_filter, limit=prefetch_limit)
+        ],
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        limit=limit,
+        with_payload=True
+    )
+
+async def rerank_candidates(search_query: SearchQuery, snippets: List[CodeSnippet]) -> List[CodeSnippet]:
+    """Reorder candidates by the reranker; slow (RERANK_TIMEOUT_MS) or failed reranking keeps the retrieval order"""
+    try:
+        with RERANK_LATENCY.time():
+            scores = await asyncio.wait_for(
+                reranker.score(search_query.query, [snippet.code for snippet in snippets]),
+                timeout=RERANK_TIMEOUT_MS / 1000
+            )
+    except asyncio.TimeoutError:
+        RERANK_FALLBACKS.labels("timeout").inc()
+        logger.warning(f"Reranking {len(snippets)} candidates exceeded {RERANK_TIMEOUT_MS:.0f} ms, keeping retrieval order")
+        return snippets
+    except Exception as e:
+        RERANK_FALLBACKS.labels("error").inc()
+        logger.warning(f"Reranking failed ({e}), keeping retrieval order")
+        return snippets
+    # sorted() is stable, so ties keep the retrieval order
+    return [snippets[i] for i in sorted(range(len(snippets)), key=lambda i: -scores[i])]
+
+async def rerank_search_results(search_queries: List[SearchQuery], results: List[SearchResult]) -> List[SearchResult]:
+    """
+    Rerank the over-fetched candidates of every query and cut them down to top_n.
+    A request takes one rerank slot; when all RERANK_MAX_CONCURRENCY slots are busy it is answered
+    in retrieval order instead of waiting
+    """
+    to_rerank = [
+        position for position, (search_query, result) in enumerate(zip(search_queries, results))
+        if should_rerank(search_query) and len(result.snippets) > 1
+    ]
+    candidates = [result.snippets for result in results]
+    
+    if to_rerank and rerank_slots.locked():
+        RERANK_FALLBACKS.labels("busy").inc(len(to_rerank))
+        logger.info(f"Reranker busy, returning {len(to_rerank)} searches in retrieval order")
+    elif to_rerank:
+        async with rerank_slots:
+            reranked = await asyncio.gather(*(
+                rerank_candidates(search_queries[position], candidates[position]) for position in to_rerank
+            ))
+        for position, snippets in zip(to_rerank, reranked):
+            candidates[position] = snippets
+    
+    return [
+        SearchResult(snippets=snippets[:search_query.top_n])
+        for search_query, snippets in zip(search_queries, candidates)
+    ]
+
 @app.post("/search", response_model=SearchResult)
 async def search_code(search_query: SearchQuery):
     """
     Search for code snippets using vector similarity with filtering
     """
+    model = resolve_model(search_query.model)
+    mode = await resolve_search_mode(search_query, model)
     try:
         # Get embedding for the query
-        query_embedding = await get_embedding(f"query: {search_query.query}")
-        
-        # Prepare filter if allowed_repos specified
-        search_filter = None
-        if search_query.allowed_repos:
-            search_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="repo.name",
-                        match=models.MatchAny(any=search_query.allowed_repos)
-                    )
-                ]
-            )
+        query_embedding = await get_query_embedding(search_query.query, model)
         
         # Search in Qdrant
-        search_results = qdrant_client.search(
-            collection_name=COLLECTION_NAME,
-            query_vector=query_embedding,
-            limit=search_query.top_n,
-            query_filter=search_filter
-        )
+        with QDRANT_LATENCY.labels("query").time():
+            response = (await qdrant_client.query_batch_points(
+                collection_name=model.collection_name,
+                requests=[build_query_request(search_query, mode, query_embedding)]
+            ))[0]
         
-        # Format results
-        snippets = []
-        for result in search_results:
-            payload = result.payload
-            snippet = CodeSnippet(
-                id=str(result.id),
-                code=payload["code"],
-                file_path=payload["file_path"],
-                line_from=payload["line_from"],
-                line_to=payload["line_to"],
-                repo=Repository(**payload["repo"])
-            )
-            snippets.append(snippet)
-        
-        return SearchResult(snippets=snippets)
+        results = await build_search_results([response.points])
+        return (await rerank_search_results([search_query], results))[0]
     
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.post("/search/batch", response_model=BatchSearchResult)
+async def search_code_batch(batch_query: BatchSearchQuery):
+    """
+    Run several searches with one embedder request and one Qdrant batch search per embedding model.
+    Results are returned in the order of the queries
+    """
+    if not batch_query.queries:
+        return BatchSearchResult(results=[])
+    
+    # Positions of the queries of every model
+    positions_by_model: Dict[EmbeddingModel, List[int]] = {}
+    modes = []
+    for position, search_query in enumerate(batch_query.queries):
+        model = resolve_model(search_query.model)
+        positions_by_model.setdefault(model, []).append(position)
+        modes.append(await resolve_search_mode(search_query, model))
+    
+    try:
+        batch_results: List[Optional[List[models.ScoredPoint]]] = [None] * len(batch_query.queries)
+        for model, positions in positions_by_model.items():
+            queries = [batch_query.queries[position] for position in positions]
+            query_embeddings = await get_query_embeddings([search_query.query for search_query in queries], model)
+            
+            with QDRANT_LATENCY.labels("query").time():
+                model_results = await qdrant_client.query_batch_points(
+                    collection_name=model.collection_name,
+                    requests=[
+                        build_query_request(batch_query.queries[position], modes[position], query_embedding)
+                        for position, query_embedding in zip(positions, query_embeddings)
+                    ]
+                )
+            for position, response in zip(positions, model_results):
+                batch_results[position] = response.points
+        
+        results = await build_search_results(batch_results)
+        return BatchSearchResult(results=await rerank_search_results(batch_query.queries, results))
+    
+    except Exception as e:
+        logger.error(f"Batch search error: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
 @app.get("/repositories")
 async def get_repositories():
     """
@@ -449,6 +567,11 @@ async def get_repositories():
         logger.error(f"Failed to load repositories config: {e}")
         raise HTTPException(status_code=500, detail="Failed to load repositories configuration")
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics; with INDEXING_IN_API they include the indexing pipeline"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # CLI tool for indexing repos (this would be a separate script)
 @app.get("/health")
 async def health_check():
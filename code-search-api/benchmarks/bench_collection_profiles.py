@@ -0,0 +1,131 @@
+"""
+Recall and latency of the collection profiles against exact search.
+
+Needs a Qdrant server (local mode has neither HNSW nor quantization). For every profile
+a scratch collection is filled with the same vectors, and top-k results at several
+hnsw_ef values are compared with exact (brute force) search on the "default" profile.
+Vectors are clustered synthetic data, or sampled from an existing collection with --source. Usage:
+
+    python benchmarks/bench_collection_profiles.py --url http://localhost:6333 --points 100000
+    python benchmarks/bench_collection_profiles.py --source code-search --points 50000 --profiles default int8 binary
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from qdrant_client import AsyncQdrantClient, models
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from collection import COLLECTION_PROFILES, collection_config, get_collection_profile, search_params  # noqa: E402
+
+# Bytes per dimension of the vectors the HNSW search reads from RAM
+BYTES_PER_DIMENSION = {None: 4, "scalar": 1, "product": 4 / 16, "binary": 1 / 8}
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int) -> List[List[float]]:
+    """Points around random centroids, closer to real embeddings than uniform noise"""
+    rng = random.Random(seed)
+    centroids = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    return [[c + rng.gauss(0, 0.6) for c in rng.choice(centroids)] for _ in range(count)]
+
+
+async def sample_vectors(client: AsyncQdrantClient, collection: str, count: int) -> List[List[float]]:
+    vectors, offset = [], None
+    while len(vectors) < count:
+        points, offset = await client.scroll(collection, limit=min(1000, count - len(vectors)), offset=offset, with_vectors=True, with_payload=False)
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    return vectors
+
+
+async def fill_collection(client: AsyncQdrantClient, name: str, profile_name: str, vectors: List[List[float]]):
+    if await client.collection_exists(name):
+        await client.delete_collection(name)
+    await client.create_collection(name, **collection_config(get_collection_profile(profile_name), vector_size=len(vectors[0])))
+
+    batch_size = 512
+    for i in range(0, len(vectors), batch_size):
+        await client.upsert(name, points=[
+            models.PointStruct(id=i + j, vector=vector) for j, vector in enumerate(vectors[i:i+batch_size])
+        ], wait=False)
+
+    # Wait until the HNSW graph and quantized vectors are built
+    while (await client.get_collection(name)).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(1)
+
+
+async def measure(client: AsyncQdrantClient, name: str, profile_name: str, queries: List[List[float]], truth: List[set], top_k: int, hnsw_ef: int) -> Dict[str, float]:
+    params = search_params(get_collection_profile(profile_name), hnsw_ef)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        points = await client.search(name, query_vector=query, limit=top_k, search_params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {point.id for point in points}) / len(expected))
+    latencies.sort()
+    return {
+        "recall": statistics.mean(recalls),
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+    }
+
+
+async def main(args: argparse.Namespace):
+    client = AsyncQdrantClient(url=args.url, prefer_grpc=True)
+    try:
+        if args.source:
+            vectors = await sample_vectors(client, args.source, args.points + args.queries)
+        else:
+            vectors = synthetic_vectors(args.points + args.queries, args.dim, args.clusters, args.seed)
+        queries, vectors = vectors[:args.queries], vectors[args.queries:]
+        dim = len(vectors[0])
+        print(f"{len(vectors)} points, {len(queries)} queries, dim {dim}, top {args.top_k}")
+
+        names = {profile: f"bench-profile-{profile}" for profile in args.profiles}
+        for profile, name in names.items():
+            start = time.perf_counter()
+            await fill_collection(client, name, profile, vectors)
+            print(f"{profile:>8}: indexed in {time.perf_counter() - start:.1f}s")
+
+        # Exact search on unquantized vectors is the ground truth
+        baseline = names.get("default") or names[args.profiles[0]]
+        exact = search_params(get_collection_profile("default"), exact=True)
+        truth = [
+            {point.id for point in await client.search(baseline, query_vector=query, limit=args.top_k, search_params=exact)}
+            for query in queries
+        ]
+
+        print(f"{'profile':>8} {'hnsw_ef':>8} {'recall':>8} {'p50 ms':>8} {'p99 ms':>8} {'vector RAM MB':>14}")
+        for profile, name in names.items():
+            ram_mb = len(vectors) * dim * BYTES_PER_DIMENSION[COLLECTION_PROFILES[profile].quantization] / 2**20
+            for hnsw_ef in args.hnsw_ef:
+                result = await measure(client, name, profile, queries, truth, args.top_k, hnsw_ef)
+                print(f"{profile:>8} {hnsw_ef:>8} {result['recall']:>8.3f} {result['p50']:>8.2f} {result['p99']:>8.2f} {ram_mb:>14.1f}")
+
+        if not args.keep:
+            for name in names.values():
+                await client.delete_collection(name)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--source", help="sample vectors from this collection instead of generating them")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--profiles", nargs="+", default=list(COLLECTION_PROFILES), choices=list(COLLECTION_PROFILES))
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collections")
+    asyncio.run(main(parser.parse_args()))
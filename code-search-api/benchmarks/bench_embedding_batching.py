@@ -0,0 +1,86 @@
+"""
+Throughput benchmark: one embedder request per snippet vs batched embedder requests.
+
+The embedder is replaced with an in-process mock that sleeps for a fixed
+per-request latency plus a small per-input cost, which is roughly how a GPU
+embedder behind HTTP behaves. Usage:
+
+    python benchmarks/bench_embedding_batching.py --snippets 2000 --latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import embedder  # noqa: E402
+
+DIM = 1536
+
+
+def make_mock_embedder(latency_ms: float, per_input_ms: float, counter: dict):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        counter["requests"] += 1
+        await asyncio.sleep((latency_ms + per_input_ms * len(inputs)) / 1000)
+        return httpx.Response(200, json={
+            "data": [{"index": i, "embedding": [0.0] * DIM} for i in range(len(inputs))]
+        })
+
+    return httpx.MockTransport(handler)
+
+
+def make_snippets(count: int):
+    code = "\n".join(f"def func_{i}(x):\n    return x * {i}" for i in range(30))
+    repo = {"name": "synthetic/repo", "path": "synthetic_repo", "url": "github.com/synthetic/repo"}
+    # Unique code per snippet, otherwise identical snippets are deduplicated before embedding
+    return [
+        {"id": str(i), "code": f"# snippet {i}\n{code}", "file_path": f"module_{i}.py", "line_from": 1, "line_to": 61, "repo": repo}
+        for i in range(count)
+    ]
+
+
+async def run(mode: str, snippets, transport) -> float:
+    embedder.embedder_client = embedder.create_embedder_client(transport=transport)
+    embedder.embedding_cache = None
+    try:
+        start = time.perf_counter()
+        if mode == "single":
+            for snippet in snippets:
+                await embedder.embed_snippets([snippet])
+        else:
+            for batch in embedder.iter_embedding_batches(snippets):
+                await embedder.embed_snippets(batch)
+        return time.perf_counter() - start
+    finally:
+        await embedder.embedder_client.aclose()
+        embedder.embedder_client = None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snippets", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--per-input-ms", type=float, default=0.05)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    snippets = make_snippets(args.snippets)
+    for mode in ("single", "batched"):
+        counter = {"requests": 0}
+        transport = make_mock_embedder(args.latency_ms, args.per_input_ms, counter)
+        elapsed = asyncio.run(run(mode, snippets, transport))
+        print(
+            f"{mode:>8}: {len(snippets)} snippets, {counter['requests']} requests, "
+            f"{elapsed:.2f}s, {len(snippets) / elapsed:.0f} snippets/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Peak RSS of snippet extraction: snippets materialized in a list vs streamed as the
+indexing pipeline consumes them from iter_repository_snippets.
+
+Builds a synthetic repository tree and runs each mode in a fresh subprocess,
+so peak RSS (ru_maxrss) of one mode does not leak into the other. Extraction runs
+in a thread of the measured process, without worker processes. Usage:
+
+    python benchmarks/bench_extraction_memory.py --files 2000 --lines 1000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def make_repo(root: str, files: int, lines: int):
+    for i in range(files):
+        package_dir = os.path.join(root, f"pkg_{i % 50}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"module_{i}.py"), "w") as f:
+            f.write("\n".join(f"value_{j} = compute(value_{j - 1}, {j})  # line {j}" for j in range(lines)))
+
+
+async def extract(mode: str, repo_path: str) -> int:
+    import indexing
+    from extraction import list_repository_files
+
+    files = list(list_repository_files(repo_path))
+    snippets, count = [], 0
+    async for _, file_snippets in indexing.iter_repository_snippets(repo_path, "synthetic/repo", files, None):
+        if mode == "list":
+            snippets.extend(file_snippets)
+        count += len(file_snippets)
+    return count
+
+
+def run_mode(mode: str, repo_path: str):
+    start = time.perf_counter()
+    count = asyncio.run(extract(mode, repo_path))
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:>6}: {count} snippets, {elapsed:.2f}s, peak RSS {peak_mb:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=1000)
+    parser.add_argument("--mode", choices=["list", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--repo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.repo)
+        return
+
+    with tempfile.TemporaryDirectory() as repo_path:
+        make_repo(repo_path, args.files, args.lines)
+        for mode in ("list", "stream"):
+            subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--repo", repo_path],
+                cwd=tempfile.gettempdir(),
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Extraction throughput: reading and chunking in one thread vs a pool of worker processes.
+
+Builds a synthetic repository of Python modules (the syntax chunker parses them
+with `ast`, which is CPU bound) and drains iter_repository_snippets in both modes. Usage:
+
+    python benchmarks/bench_parallel_extraction.py --files 2000 --functions 40 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def make_repo(root: str, files: int, functions: int):
+    body = "\n".join(f"    total += helper_{{i}}(value, {j})" for j in range(20))
+    for i in range(files):
+        package_dir = os.path.join(root, f"pkg_{i % 50}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"module_{i}.py"), "w") as f:
+            f.write("\n\n".join(
+                f"def function_{k}(value):\n    total = 0\n{body.format(i=k)}\n    return total"
+                for k in range(functions)
+            ))
+
+
+async def drain(repo_path: str, executor) -> int:
+    import indexing
+    from extraction import list_repository_files
+
+    files = list(list_repository_files(repo_path))
+    count = 0
+    async for _, snippets in indexing.iter_repository_snippets(repo_path, "synthetic/repo", files, executor):
+        count += len(snippets)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--functions", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    os.environ["EXTRACT_WORKERS"] = str(args.workers)
+    import indexing
+
+    with tempfile.TemporaryDirectory() as root:
+        make_repo(root, args.files, args.functions)
+
+        for mode in ("thread", "processes"):
+            executor = indexing.create_extraction_pool() if mode == "processes" else None
+            try:
+                start = time.perf_counter()
+                count = asyncio.run(drain(root, executor))
+                elapsed = time.perf_counter() - start
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            print(f"{mode:>9}: {count} snippets from {args.files} files, {elapsed:.2f}s, {args.files / elapsed:.0f} files/s")
+
+
+if __name__ == "__main__":
+    main()
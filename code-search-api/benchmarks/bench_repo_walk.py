@@ -0,0 +1,65 @@
+"""
+File discovery speed: per-extension recursive glob vs single-pass scandir walk.
+
+Builds a synthetic monorepo with source files spread over nested packages plus
+a large node_modules tree, then times both discovery strategies. Usage:
+
+    python benchmarks/bench_repo_walk.py --packages 200 --files 20 --node-modules 20000
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from repo_walker import CODE_EXTENSIONS, ExcludeRules, iter_source_files  # noqa: E402
+
+
+def make_repo(root: str, packages: int, files: int, node_modules: int):
+    extensions = sorted(CODE_EXTENSIONS) + [".md", ".json", ".txt"]
+    for p in range(packages):
+        package_dir = os.path.join(root, f"group_{p % 10}", f"package_{p}", "src")
+        os.makedirs(package_dir, exist_ok=True)
+        for f in range(files):
+            open(os.path.join(package_dir, f"file_{f}{extensions[f % len(extensions)]}"), "w").close()
+    for n in range(node_modules):
+        module_dir = os.path.join(root, "node_modules", f"dep_{n % 500}", "lib")
+        os.makedirs(module_dir, exist_ok=True)
+        open(os.path.join(module_dir, f"index_{n}.js"), "w").close()
+
+
+def glob_walk(repo_path: str):
+    found = []
+    for ext in sorted(CODE_EXTENSIONS):
+        for file_path in glob.glob(f"{repo_path}/**/*{ext}", recursive=True):
+            rel_path = os.path.relpath(file_path, repo_path)
+            if any(d in rel_path.split(os.sep) for d in ['__pycache__', 'node_modules', '.git']):
+                continue
+            found.append(file_path)
+    return found
+
+
+def scandir_walk(repo_path: str):
+    return [path for path, _ in iter_source_files(repo_path, ExcludeRules.for_repository(repo_path))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=200)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--node-modules", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as repo_path:
+        make_repo(repo_path, args.packages, args.files, args.node_modules)
+        for name, walk in (("glob x13", glob_walk), ("scandir", scandir_walk)):
+            start = time.perf_counter()
+            found = walk(repo_path)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>9}: {len(found)} files in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
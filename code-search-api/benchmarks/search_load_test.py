@@ -0,0 +1,105 @@
+"""
+/search latency under concurrent load, with the index idle and while a reindex runs.
+
+Runs against a deployed API (api.py plus the indexer worker, see docker-compose.yml).
+The first phase measures /search alone; then a forced reindex is queued through /reindex
+(so up-to-date repositories are indexed again) and, once /status reports it running, the
+second phase measures /search again. With indexing in a separate process the p99 of both
+phases should stay close. Usage:
+
+    python benchmarks/search_load_test.py --url http://localhost:8000 --concurrency 16 --duration 30
+    python benchmarks/search_load_test.py --no-reindex   # idle phase only
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+QUERIES = [
+    "parse configuration file",
+    "retry http request with backoff",
+    "websocket message handler",
+    "connect to postgres database",
+    "build vector search filter",
+    "split source file into chunks",
+    "read environment variables",
+    "cache embeddings of queries",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+async def search_client(client: httpx.AsyncClient, deadline: float, worker: int, latencies: List[float], errors: List[str]):
+    i = worker
+    while time.perf_counter() < deadline:
+        query = QUERIES[i % len(QUERIES)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.post("/search", json={"query": query, "top_n": 10})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+
+async def run_phase(client: httpx.AsyncClient, name: str, concurrency: int, duration: float):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(search_client(client, deadline, worker, latencies, errors) for worker in range(concurrency)))
+
+    if not latencies:
+        print(f"{name:>9}: no successful requests, {len(errors)} errors (first: {errors[0] if errors else '-'})")
+        return
+    ms = [latency * 1000 for latency in latencies]
+    print(
+        f"{name:>9}: {len(ms)} requests, {len(ms) / duration:.0f} req/s, {len(errors)} errors, "
+        f"p50 {statistics.median(ms):.1f} ms, p95 {percentile(ms, 95):.1f} ms, p99 {percentile(ms, 99):.1f} ms, max {max(ms):.1f} ms"
+    )
+
+
+async def wait_for_indexing(client: httpx.AsyncClient, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        status = (await client.get("/status")).json()
+        if status["index"]["status"] == "indexing":
+            return True
+        await asyncio.sleep(0.5)
+    return False
+
+
+async def main(args: argparse.Namespace):
+    async with httpx.AsyncClient(base_url=args.url, timeout=60.0, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        # Warm up connections and the query embedding cache
+        for query in QUERIES:
+            (await client.post("/search", json={"query": query, "top_n": 10})).raise_for_status()
+
+        await run_phase(client, "idle", args.concurrency, args.duration)
+        if args.no_reindex:
+            return
+
+        response = await client.post("/reindex", json={"repos": args.repo, "force": True})
+        response.raise_for_status()
+        job = response.json()
+        print(f"queued reindex job {job['id']}, waiting for the indexer to pick it up")
+        if not await wait_for_indexing(client, timeout=args.wait):
+            print("indexing did not start, is the indexer worker running?")
+            return
+        await run_phase(client, "reindex", args.concurrency, args.duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per phase")
+    parser.add_argument("--repo", action="append", help="repository to reindex (repeatable), defaults to all")
+    parser.add_argument("--wait", type=float, default=120.0, help="seconds to wait for the reindex to start")
+    parser.add_argument("--no-reindex", action="store_true")
+    asyncio.run(main(parser.parse_args()))
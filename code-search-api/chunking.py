@@ -0,0 +1,253 @@
+import ast
+import os
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (no tokenizer available on the API side)"""
+    return len(text) // 4 + 1
+
+
+class Chunk(NamedTuple):
+    line_from: int  # 1-based, inclusive
+    line_to: int    # 1-based, inclusive
+    code: str
+
+
+class _Unit(NamedTuple):
+    """Syntactic unit of a file: lines [start, end) (0-based) and the units it can be split into"""
+    start: int
+    end: int
+    children: List['_Unit']
+
+
+class LineChunker:
+    """Fixed windows of chunk_lines lines (the original chunking)"""
+
+    def __init__(self, chunk_lines: int = 100):
+        self.chunk_lines = chunk_lines
+
+    def chunk(self, content: str, rel_path: str) -> List[Chunk]:
+        lines = content.split('\n')
+        chunks = []
+        for i in range(0, len(lines), self.chunk_lines):
+            code = '\n'.join(lines[i:i+self.chunk_lines])
+            if code.strip():
+                chunks.append(Chunk(i + 1, min(i + self.chunk_lines, len(lines)), code))
+        return chunks
+
+
+class SyntaxChunker:
+    """
+    Splits files along function and class boundaries and packs neighbouring small units
+    into chunks of at most max_tokens. Units larger than max_tokens are split into their
+    members, and as a last resort into line windows; parts of a split unit overlap by overlap_lines.
+    A single line over max_tokens (e.g. minified code) is cut into pieces of max_tokens by characters,
+    all pointing at that line.
+
+    Python files are split with `ast`; other languages use an indentation heuristic.
+    Language-specific splitters can be registered per extension in `splitters`.
+    """
+
+    def __init__(self, max_tokens: int = 1000, overlap_lines: int = 10):
+        self.max_tokens = max_tokens
+        self.overlap_lines = overlap_lines
+        self.splitters: Dict[str, Callable[[List[str]], Optional[List[_Unit]]]] = {
+            '.py': _python_units,
+        }
+
+    def chunk(self, content: str, rel_path: str) -> List[Chunk]:
+        lines = content.split('\n')
+        if not content.strip():
+            return []
+
+        # Prefix sums of characters per line for O(1) token estimates of line ranges
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line) + 1)
+
+        splitter = self.splitters.get(os.path.splitext(rel_path)[1])
+        units = splitter(lines) if splitter else None
+        if units is None:
+            units = _indentation_units(lines, 0, len(lines))
+
+        ranges = self._pack(_cover(units, 0, len(lines)), offsets)
+
+        chunks = []
+        for start, end in ranges:
+            # Drop blank lines at the edges so line ranges point at actual code
+            while start < end and not lines[start].strip():
+                start += 1
+            while end > start and not lines[end - 1].strip():
+                end -= 1
+            if start < end:
+                code = '\n'.join(lines[start:end])
+                chunks.extend(Chunk(start + 1, end, piece) for piece in self._split_long(code))
+        return chunks
+
+    def _split_long(self, code: str) -> List[str]:
+        """Only a range of a single line can exceed max_tokens, it is split by characters"""
+        if estimate_tokens(code) <= self.max_tokens:
+            return [code]
+        size = max(self.max_tokens - 1, 1) * 4
+        pieces = (code[i:i+size] for i in range(0, len(code), size))
+        return [piece for piece in pieces if piece.strip()]
+
+    def _tokens(self, offsets: List[int], start: int, end: int) -> int:
+        return (offsets[end] - offsets[start]) // 4 + 1
+
+    def _pack(self, units: List[_Unit], offsets: List[int]) -> List[Tuple[int, int]]:
+        ranges = []
+        current_start, current_end, current_tokens = None, None, 0
+
+        for unit in units:
+            tokens = self._tokens(offsets, unit.start, unit.end)
+
+            if tokens > self.max_tokens:
+                if current_start is not None:
+                    ranges.append((current_start, current_end))
+                    current_start, current_end, current_tokens = None, None, 0
+                if unit.children:
+                    # The unit is split inside its body, so consecutive parts overlap for context
+                    parts = self._pack(_cover(unit.children, unit.start, unit.end), offsets)
+                    overlapped = parts[:1]
+                    for part_start, part_end in parts[1:]:
+                        overlap_start = max(part_start - self.overlap_lines, unit.start)
+                        previous_start, previous_end = overlapped[-1]
+                        if overlap_start <= previous_start + self.overlap_lines and self._tokens(offsets, previous_start, part_end) <= self.max_tokens:
+                            # The previous part is not much more than the overlap (e.g. a short header), merge it
+                            overlapped[-1] = (previous_start, part_end)
+                            continue
+                        # The overlap is cut short where it would take the part over max_tokens
+                        while overlap_start < part_start and self._tokens(offsets, overlap_start, part_end) > self.max_tokens:
+                            overlap_start += 1
+                        overlapped.append((overlap_start, part_end))
+                    ranges.extend(overlapped)
+                else:
+                    ranges.extend(self._windows(unit.start, unit.end, offsets))
+                continue
+
+            if current_start is not None and current_tokens + tokens > self.max_tokens:
+                ranges.append((current_start, current_end))
+                current_start, current_end, current_tokens = None, None, 0
+
+            if current_start is None:
+                current_start = unit.start
+            current_end = unit.end
+            current_tokens += tokens
+
+        if current_start is not None:
+            ranges.append((current_start, current_end))
+        return ranges
+
+    def _windows(self, start: int, end: int, offsets: List[int]) -> List[Tuple[int, int]]:
+        """Split lines [start, end) into windows of at most max_tokens with overlap_lines of overlap"""
+        ranges = []
+        window_start = start
+        while window_start < end:
+            window_end = window_start + 1
+            while window_end < end and self._tokens(offsets, window_start, window_end + 1) <= self.max_tokens:
+                window_end += 1
+            ranges.append((window_start, window_end))
+            if window_end >= end:
+                break
+            window_start = max(window_end - self.overlap_lines, window_start + 1)
+        return ranges
+
+
+def _cover(units: List[_Unit], start: int, end: int) -> List[_Unit]:
+    """
+    Stretch units so they cover [start, end) without gaps: lines between units
+    (comments, blank lines, a class header) go with the following unit, trailing lines with the last one.
+    """
+    if not units:
+        return [_Unit(start, end, [])]
+
+    covered = []
+    previous_end = start
+    for unit in units:
+        covered.append(_Unit(previous_end, unit.end, unit.children))
+        previous_end = unit.end
+    last = covered[-1]
+    covered[-1] = _Unit(last.start, max(end, last.end), last.children)
+    return covered
+
+
+def _python_units(lines: List[str]) -> Optional[List[_Unit]]:
+    try:
+        tree = ast.parse('\n'.join(lines))
+    except (SyntaxError, ValueError):
+        return None
+    return _python_body_units(tree.body)
+
+
+def _python_body_units(body: List[ast.AST]) -> List[_Unit]:
+    units = []
+    for node in body:
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])]) - 1
+        end = node.end_lineno
+        # Nested blocks of compound statements (def, class, if, for, try, with, ...), in source order
+        nested = []
+        for field in ('body', 'handlers', 'orelse', 'finalbody'):
+            nested.extend(getattr(node, field, None) or [])
+        children = _python_body_units(nested) if len(nested) > 1 else []
+        units.append(_Unit(start, end, children))
+    return units
+
+
+_COMMENT_PREFIXES = ('//', '/*', '*', '#', '@', '--')
+_CLOSING = re.compile(r'^[}\])]')
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _indentation_units(lines: List[str], start: int, end: int) -> List[_Unit]:
+    """
+    Heuristic units for languages without a parser: a unit starts at every code line with the
+    smallest indentation in [start, end) and runs until the next such line. Closing brackets
+    stay with the unit they close, comments and annotations go with the unit below them.
+    """
+    code_lines = [i for i in range(start, end) if lines[i].strip()]
+    opening_lines = [i for i in code_lines if not _CLOSING.match(lines[i].strip())]
+    if len(opening_lines) < 2:
+        return []
+
+    base = min(_indent(lines[i]) for i in opening_lines)
+    starts = []
+    previous_comment = None
+    for i in opening_lines:
+        if _indent(lines[i]) != base:
+            previous_comment = None
+            continue
+        # Comments and annotations directly above a declaration start the declaration's unit
+        if previous_comment is not None and previous_comment == i - 1:
+            previous_comment = i if lines[i].strip().startswith(_COMMENT_PREFIXES) else None
+            continue
+        previous_comment = i if lines[i].strip().startswith(_COMMENT_PREFIXES) else None
+        starts.append(i)
+
+    if len(starts) < 2:
+        # A single top-level block: look for units one indentation level deeper
+        inner_start = code_lines[0] + 1
+        inner_end = code_lines[-1]
+        if inner_start < inner_end and any(_indent(lines[i]) > base for i in range(inner_start, inner_end) if lines[i].strip()):
+            return _indentation_units(lines, inner_start, inner_end)
+        return []
+
+    units = []
+    for index, unit_start in enumerate(starts):
+        unit_end = starts[index + 1] if index + 1 < len(starts) else end
+        # Skip the unit's first line so its children are split inside its body
+        units.append(_Unit(unit_start, unit_end, _indentation_units(lines, unit_start + 1, unit_end)))
+    return units
+
+
+def create_chunker(name: str = "syntax", max_tokens: int = 1000, overlap_lines: int = 10):
+    if name == "syntax":
+        return SyntaxChunker(max_tokens=max_tokens, overlap_lines=overlap_lines)
+    if name == "lines":
+        return LineChunker()
+    raise ValueError(f"Unknown chunker '{name}', expected 'syntax' or 'lines'")
@@ -0,0 +1,190 @@
+import logging
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from qdrant_client import AsyncQdrantClient, models
+
+from config import (
+    COLLECTION_NAME,
+    COLLECTION_PROFILE,
+    HNSW_EF_CONSTRUCT,
+    HNSW_M,
+    LEXICAL_VECTORS_ENABLED,
+    QDRANT_API_KEY,
+    QDRANT_GRPC_PORT,
+    QDRANT_PREFER_GRPC,
+    QDRANT_URL,
+    STORE_CODE_IN_PAYLOAD,
+)
+from extraction import repository_info, repository_path
+from repo_walker import language_of
+
+logger = logging.getLogger(__name__)
+
+# Global client, shared by the search API and the indexer
+qdrant_client = AsyncQdrantClient(
+    url=QDRANT_URL,
+    api_key=QDRANT_API_KEY,
+    prefer_grpc=QDRANT_PREFER_GRPC,
+    grpc_port=QDRANT_GRPC_PORT
+)
+
+class CollectionProfile(NamedTuple):
+    quantization: Optional[str]  # None, "scalar", "product" or "binary"
+    vectors_on_disk: bool
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    # Quantized candidates fetched per requested result and rescored with the original vectors
+    oversampling: float = 1.0
+
+# Quantized vectors stay in RAM for the HNSW search, the float32 originals are read from disk only to rescore
+COLLECTION_PROFILES = {
+    "default": CollectionProfile(quantization=None, vectors_on_disk=False),
+    "on_disk": CollectionProfile(quantization=None, vectors_on_disk=True),
+    "int8": CollectionProfile(quantization="scalar", vectors_on_disk=True, oversampling=2.0),
+    "pq": CollectionProfile(quantization="product", vectors_on_disk=True, oversampling=4.0),
+    "binary": CollectionProfile(quantization="binary", vectors_on_disk=True, oversampling=3.0),
+}
+
+def get_collection_profile(name: str = COLLECTION_PROFILE) -> CollectionProfile:
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of {', '.join(COLLECTION_PROFILES)}")
+    profile = COLLECTION_PROFILES[name]
+    return profile._replace(
+        hnsw_m=HNSW_M or profile.hnsw_m,
+        hnsw_ef_construct=HNSW_EF_CONSTRUCT or profile.hnsw_ef_construct
+    )
+
+def quantization_config(profile: CollectionProfile) -> Optional[models.QuantizationConfig]:
+    if profile.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile.quantization == "product":
+        return models.ProductQuantization(
+            product=models.ProductQuantizationConfig(compression=models.CompressionRatio.X16, always_ram=True)
+        )
+    if profile.quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return None
+
+def collection_config(profile: CollectionProfile, vector_size: int) -> Dict[str, Any]:
+    """Arguments of create_collection for a profile"""
+    return {
+        "vectors_config": models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=profile.vectors_on_disk
+        ),
+        "hnsw_config": models.HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+        "quantization_config": quantization_config(profile),
+        # Qdrant weighs the stored term frequencies with the collection-wide IDF at query time
+        "sparse_vectors_config": {
+            LEXICAL_VECTOR: models.SparseVectorParams(modifier=models.Modifier.IDF)
+        } if LEXICAL_VECTORS_ENABLED else None
+    }
+
+def search_params(profile: CollectionProfile, hnsw_ef: Optional[int] = None, exact: bool = False) -> Optional[models.SearchParams]:
+    """Search parameters: HNSW beam width, and rescoring of quantized candidates with the original vectors"""
+    if profile.quantization is None and hnsw_ef is None and not exact:
+        return None
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef,
+        exact=exact,
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=profile.oversampling
+        ) if profile.quantization else None
+    )
+
+# Name of the sparse lexical vector; the dense vector is the unnamed default one
+LEXICAL_VECTOR = "lexical"
+
+# Collections that store lexical vectors and so support hybrid search, filled by ensure_collection_exists
+# and has_lexical_vectors
+lexical_collections: Set[str] = set()
+
+async def has_lexical_vectors(collection_name: str) -> bool:
+    """
+    Whether the collection supports hybrid search. Collections created after startup
+    (e.g. by the indexer process) are looked up in Qdrant on first use.
+    """
+    if collection_name in lexical_collections:
+        return True
+    try:
+        collection_info = await qdrant_client.get_collection(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not get collection {collection_name}: {e}")
+        return False
+    if LEXICAL_VECTOR not in (collection_info.config.params.sparse_vectors or {}):
+        return False
+    lexical_collections.add(collection_name)
+    return True
+
+# Keyword indexes for the payload fields search results are filtered on.
+# Points of one repository are stored together (is_tenant), which speeds up allowed_repos filters.
+PAYLOAD_INDEXES = {
+    "repo.name": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+    "file_path": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+    "language": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+}
+
+def snippet_payload(snippet: Dict[str, Any], store_code: bool = STORE_CODE_IN_PAYLOAD) -> Dict[str, Any]:
+    """
+    Compact point payload: the repository is stored by name only when its local path and URL
+    are the ones derived from the name (snippets posted to /index may carry others),
+    and the code is left out unless store_code is set.
+    """
+    repo_name = snippet["repo"]["name"]
+    derived = repository_info(repository_path(repo_name), repo_name)
+    repo = {key: value for key, value in snippet["repo"].items() if key == "name" or value != derived.get(key)}
+    payload = {
+        "file_path": snippet["file_path"],
+        "line_from": snippet["line_from"],
+        "line_to": snippet["line_to"],
+        "language": language_of(snippet["file_path"]),
+        "repo": repo
+    }
+    if store_code:
+        payload["code"] = snippet["code"]
+    return payload
+
+async def ensure_payload_indexes(collection_name: str, payload_schema: Dict[str, Any]):
+    """Create missing payload indexes; also upgrades collections created without them"""
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        if field_name not in payload_schema:
+            logger.info(f"Creating payload index on {field_name} in {collection_name}")
+            await qdrant_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True
+            )
+
+# Initialize collection
+async def ensure_collection_exists(collection_name: str = COLLECTION_NAME, vector_size: Optional[int] = None) -> bool:
+    """
+    Make sure the collection exists with its payload indexes. A missing collection is created
+    only when vector_size (the embedding dimension) is known; returns whether the collection exists.
+    """
+    try:
+        if not await qdrant_client.collection_exists(collection_name):
+            if vector_size is None:
+                logger.info(f"Collection {collection_name} does not exist yet, it is created once the embedding dimension is known")
+                return False
+            logger.info(f"Creating collection {collection_name} ({vector_size} dimensions) with profile {COLLECTION_PROFILE}")
+            await qdrant_client.create_collection(
+                collection_name=collection_name,
+                **collection_config(get_collection_profile(), vector_size=vector_size)
+            )
+        collection_info = await qdrant_client.get_collection(collection_name)
+        await ensure_payload_indexes(collection_name, collection_info.payload_schema)
+        if LEXICAL_VECTOR in (collection_info.config.params.sparse_vectors or {}):
+            lexical_collections.add(collection_name)
+        else:
+            logger.info(f"Collection {collection_name} has no lexical vectors, hybrid search is not available for it")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create collection: {e}")
+        raise
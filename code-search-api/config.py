@@ -0,0 +1,103 @@
+import json
+import os
+import uuid
+
+# Configuration shared by the search API (api.py) and the indexing worker (indexer.py)
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+EMBEDDER_URL = os.getenv("EMBEDDER_URL", "http://embedder:8000/v1/embeddings")
+COLLECTION_NAME = "code-search"
+REPOS_DIR = "./data/semantic_search/repos"
+CONFIG_FILE = os.getenv("CONFIG_PATH", "repos_config.json")
+INDEX_STATE_PATH = os.getenv("INDEX_STATE_PATH", "./data/semantic_search/index_state.sqlite")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/semantic_search/embedding_cache.sqlite")
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+
+# Storage profile of a newly created collection: "default" (float32 in RAM), "on_disk",
+# "int8" (scalar quantization), "pq" (product quantization) or "binary" (binary quantization).
+# Quantized profiles keep the original vectors on disk for rescoring. Existing collections keep their settings.
+COLLECTION_PROFILE = os.getenv("COLLECTION_PROFILE", "default")
+# Optional HNSW overrides of the profile (graph degree and construction beam width)
+HNSW_M = int(os.getenv("HNSW_M")) if os.getenv("HNSW_M") else None
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT")) if os.getenv("HNSW_EF_CONSTRUCT") else None
+
+# Hybrid search: new collections get a sparse lexical (BM25) vector next to the dense one,
+# /search fuses both rankings with reciprocal rank fusion over HYBRID_PREFETCH_MULTIPLIER * top_n candidates each
+LEXICAL_VECTORS_ENABLED = os.getenv("LEXICAL_VECTORS_ENABLED", "true").lower() == "true"
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector")
+HYBRID_PREFETCH_MULTIPLIER = int(os.getenv("HYBRID_PREFETCH_MULTIPLIER", "4"))
+
+# Keep snippet code in the Qdrant payload; when disabled, search results read it from the repository clones
+STORE_CODE_IN_PAYLOAD = os.getenv("STORE_CODE_IN_PAYLOAD", "true").lower() == "true"
+
+# Query embedding cache; QUERY_CACHE_REDIS_URL adds a Redis store shared by API replicas
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_REDIS_URL = os.getenv("QUERY_CACHE_REDIS_URL", None)
+
+# Namespace of the content-addressed point ids
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2a8e-3c1b-4f0e-9a43-5d2b7c8e9f10")
+
+# "incremental": pull repositories and reindex only files changed since the last indexed commit
+# "skip_if_populated": index only into an empty collection
+INDEXING_MODE = os.getenv("INDEXING_MODE", "incremental")
+
+# Default embedding model of /search, served at EMBEDDER_URL
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "Qodo/Qodo-Embed-1-1.5B")
+# Additional embedding models, each indexed into its own collection and selectable per search, as JSON:
+# [{"name": "BAAI/bge-small-en-v1.5", "url": "http://embedder-small:8000/v1/embeddings"}]
+# "url" defaults to EMBEDDER_URL, "collection" to code-search-<model>
+EMBEDDING_MODELS = json.loads(os.getenv("EMBEDDING_MODELS", "[]"))
+# Collections that existed before per-model collections keep their names
+MODEL_COLLECTIONS = {"Qodo/Qodo-Embed-1-1.5B": COLLECTION_NAME}
+
+# Run indexing inside the API process instead of the separate worker (indexer.py), e.g. for local development
+INDEXING_IN_API = os.getenv("INDEXING_IN_API", "false").lower() == "true"
+
+# Indexing worker: periodic incremental reindex (0 disables) and how often queued /reindex jobs are polled
+INDEXER_INTERVAL = float(os.getenv("INDEXER_INTERVAL", "0"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "5"))
+# Port of the indexing worker's Prometheus metrics (the API serves them on /metrics), 0 disables
+INDEXER_METRICS_PORT = int(os.getenv("INDEXER_METRICS_PORT", "9100"))
+
+# Embedding batching: max snippets per embedder request and an approximate token budget per request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "16384"))
+
+# Connection pool of the shared embedder HTTP client
+EMBEDDER_MAX_CONNECTIONS = int(os.getenv("EMBEDDER_MAX_CONNECTIONS", "32"))
+EMBEDDER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("EMBEDDER_MAX_KEEPALIVE_CONNECTIONS", "16"))
+EMBEDDER_KEEPALIVE_EXPIRY = float(os.getenv("EMBEDDER_KEEPALIVE_EXPIRY", "60"))
+EMBEDDER_HTTP2 = os.getenv("EMBEDDER_HTTP2", "false").lower() == "true"
+
+# Indexing pipeline: concurrent embedder requests and batches buffered between pipeline stages
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+INDEXING_QUEUE_SIZE = int(os.getenv("INDEXING_QUEUE_SIZE", "8"))
+
+# Reading and chunking files: worker processes (0 = one per CPU, 1 = a thread of the indexing process)
+# and files per task handed to a worker
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0"))
+EXTRACT_FILES_PER_TASK = int(os.getenv("EXTRACT_FILES_PER_TASK", "32"))
+
+# Chunking: "syntax" splits along function/class boundaries, "lines" uses fixed 100-line windows
+CHUNKER = os.getenv("CHUNKER", "syntax")
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "1000"))
+CHUNK_OVERLAP_LINES = int(os.getenv("CHUNK_OVERLAP_LINES", "10"))
+
+# Extra .gitignore-style exclude patterns for indexing, comma separated (e.g. "third_party/,*.min.js")
+INDEX_EXCLUDE = [pattern.strip() for pattern in os.getenv("INDEX_EXCLUDE", "").split(",") if pattern.strip()]
+INDEX_USE_GITIGNORE = os.getenv("INDEX_USE_GITIGNORE", "true").lower() == "true"
+
+# Reranking of search results: "" disables it, "lexical" rescores by BM25 over the candidates,
+# "http" calls a cross-encoder with a Cohere/Jina-style rerank API (e.g. vLLM /v1/rerank)
+RERANKER = os.getenv("RERANKER", "")
+RERANKER_URL = os.getenv("RERANKER_URL", "")
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "") or None
+# Candidates fetched from Qdrant for reranking before cutting them down to top_n
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+# Latency budget of one rerank call; results keep the retrieval order when it is exceeded
+RERANK_TIMEOUT_MS = float(os.getenv("RERANK_TIMEOUT_MS", "300"))
+# Concurrent rerank calls; searches arriving while all are busy skip reranking instead of queueing
+RERANK_MAX_CONCURRENCY = int(os.getenv("RERANK_MAX_CONCURRENCY", "4"))
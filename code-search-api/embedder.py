@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import httpx
+from qdrant_client import models
+
+from chunking import estimate_tokens
+from config import (
+    COLLECTION_NAME,
+    EMBED_BATCH_MAX_TOKENS,
+    EMBED_BATCH_SIZE,
+    EMBEDDER_HTTP2,
+    EMBEDDER_KEEPALIVE_EXPIRY,
+    EMBEDDER_MAX_CONNECTIONS,
+    EMBEDDER_MAX_KEEPALIVE_CONNECTIONS,
+    EMBEDDER_URL,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    EMBEDDING_MODELS,
+    MODEL_COLLECTIONS,
+    STORE_CODE_IN_PAYLOAD,
+)
+from collection import LEXICAL_VECTOR, ensure_collection_exists, lexical_collections, qdrant_client, snippet_payload
+from embedding_cache import EmbeddingCache, content_hash
+from lexical import document_sparse_vector
+from metrics import EMBEDDER_ERRORS, EMBEDDER_IN_PROGRESS, EMBEDDER_INPUTS, EMBEDDER_LATENCY, EMBEDDER_REQUESTS, EMBEDDER_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedderError(Exception):
+    """
+    The embedder service failed or returned an unexpected response. Permanent errors are
+    rejections of the input itself (e.g. a text over the context length), which retrying cannot fix.
+    """
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class EmbeddingModel(NamedTuple):
+    name: str
+    url: str
+    collection_name: str  # every model is indexed into its own collection
+
+
+def model_collection_name(model_name: str) -> str:
+    return MODEL_COLLECTIONS.get(model_name) or f"{COLLECTION_NAME}-{re.sub(r'[^a-z0-9]+', '-', model_name.lower()).strip('-')}"
+
+def load_embedding_models() -> Dict[str, EmbeddingModel]:
+    """The default model (EMBEDDING_MODEL at EMBEDDER_URL) followed by the models in EMBEDDING_MODELS"""
+    registry = {EMBEDDING_MODEL: EmbeddingModel(EMBEDDING_MODEL, EMBEDDER_URL, model_collection_name(EMBEDDING_MODEL))}
+    for entry in EMBEDDING_MODELS:
+        name = entry["name"]
+        registry[name] = EmbeddingModel(
+            name,
+            entry.get("url") or EMBEDDER_URL,
+            entry.get("collection") or model_collection_name(name)
+        )
+    return registry
+
+embedding_models = load_embedding_models()
+
+def get_embedding_model(name: Optional[str] = None) -> EmbeddingModel:
+    """A registered model by name, or the default model"""
+    if name is None:
+        return embedding_models[EMBEDDING_MODEL]
+    if name not in embedding_models:
+        raise ValueError(f"Unknown embedding model '{name}', available: {', '.join(embedding_models)}")
+    return embedding_models[name]
+
+# Process-scoped embedder client, opened on startup and closed on shutdown
+embedder_client: Optional[httpx.AsyncClient] = None
+
+# Embeddings of already seen code, shared by every repository and run
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH) if EMBEDDING_CACHE_ENABLED else None
+
+def create_embedder_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=EMBEDDER_MAX_CONNECTIONS,
+            max_keepalive_connections=EMBEDDER_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=EMBEDDER_KEEPALIVE_EXPIRY
+        ),
+        http2=EMBEDDER_HTTP2,
+        timeout=60.0,
+        **kwargs
+    )
+
+def get_embedder_client() -> httpx.AsyncClient:
+    if embedder_client is None:
+        raise RuntimeError("Embedder client not initialized. It is created on startup.")
+    return embedder_client
+
+def open_embedder_client(**kwargs) -> httpx.AsyncClient:
+    global embedder_client
+    embedder_client = create_embedder_client(**kwargs)
+    return embedder_client
+
+async def close_embedder_client():
+    global embedder_client
+    if embedder_client is not None:
+        await embedder_client.aclose()
+        embedder_client = None
+
+async def check_embedder_available(model: Optional[EmbeddingModel] = None) -> bool:
+    model = model or get_embedding_model()
+    try:
+        response = await get_embedder_client().post(
+            model.url,
+            json={
+                "input": "test",
+                "model": model.name
+            },
+            timeout=5.0
+        )
+        if response.status_code == 200 and "data" in response.json():
+            return True
+        return False
+    except Exception:
+        return False
+
+async def probe_vector_size(model: EmbeddingModel) -> int:
+    """Dimension of the model's embeddings, asked from the embedder itself"""
+    return len((await get_embeddings(["dimension probe"], model))[0])
+
+async def ensure_model_collection(model: EmbeddingModel) -> bool:
+    """
+    Make sure the model's collection exists, creating it with the dimension probed from the embedder.
+    Returns False when the collection is missing and the embedder is not reachable yet.
+    """
+    if await qdrant_client.collection_exists(model.collection_name):
+        return await ensure_collection_exists(model.collection_name)
+    try:
+        vector_size = await probe_vector_size(model)
+    except EmbedderError as e:
+        logger.warning(f"Could not probe the embedding dimension of {model.name}: {e}")
+        return False
+    return await ensure_collection_exists(model.collection_name, vector_size)
+
+def build_embedding_prompt(text: str) -> str:
+    instruction = "Instruct: Given Code or Text, retrieval relevant content\nQuery: "
+    return f"{instruction}{text}" if "query" in text else text
+
+def iter_embedding_batches(snippets: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """Group snippets into embedder requests limited by EMBED_BATCH_SIZE and EMBED_BATCH_MAX_TOKENS"""
+    batch = []
+    batch_tokens = 0
+
+    for snippet in snippets:
+        tokens = estimate_tokens(snippet["code"])
+        if batch and (len(batch) >= EMBED_BATCH_SIZE or batch_tokens + tokens > EMBED_BATCH_MAX_TOKENS):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        # A snippet larger than the token budget still gets its own batch
+        batch.append(snippet)
+        batch_tokens += tokens
+
+    if batch:
+        yield batch
+
+# Get embeddings from vllm service
+async def get_embeddings(texts: List[str], model: Optional[EmbeddingModel] = None) -> List[List[float]]:
+    """Embed several texts in one request. Vectors are returned in the order of the input texts"""
+    model = model or get_embedding_model()
+    inputs = [build_embedding_prompt(text) for text in texts]
+    EMBEDDER_REQUESTS.labels(model.name).inc()
+    EMBEDDER_INPUTS.labels(model.name).inc(len(inputs))
+    try:
+        with EMBEDDER_LATENCY.labels(model.name).time(), EMBEDDER_IN_PROGRESS.labels(model.name).track_inprogress():
+            response = await get_embedder_client().post(
+                model.url,
+                json={
+                    "input": inputs,
+                    "model": model.name
+                }
+            )
+
+        if response.status_code != 200:
+            logger.error(f"Embedding API error: Status={response.status_code}, Response={response.text}")
+            # Client errors other than timeouts and rate limits reject the input, retrying does not help
+            permanent = 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+            raise EmbedderError(f"Embedding service error: {response.text}", permanent=permanent)
+
+        body = response.json()
+        data = body["data"]
+        if len(data) != len(texts):
+            raise ValueError(f"Embedder returned {len(data)} vectors for {len(texts)} inputs")
+        # vLLM reports the exact token count in the OpenAI-style usage block
+        usage = body.get("usage") or {}
+        EMBEDDER_TOKENS.labels(model.name).inc(usage.get("prompt_tokens") or sum(estimate_tokens(text) for text in inputs))
+
+        # OpenAI-compatible API marks every vector with the index of its input
+        return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+
+    except EmbedderError:
+        EMBEDDER_ERRORS.labels(model.name).inc()
+        raise
+    except Exception as e:
+        EMBEDDER_ERRORS.labels(model.name).inc()
+        logger.error(f"Failed to get embedding: {e}")
+        raise EmbedderError(f"Embedding error: {str(e)}") from e
+
+async def get_embedding(text: str, model: Optional[EmbeddingModel] = None) -> List[float]:
+    return (await get_embeddings([text], model))[0]
+
+async def embed_texts(texts_by_hash: Dict[str, str], model: Optional[EmbeddingModel] = None) -> Dict[str, List[float]]:
+    """
+    Embed texts keyed by content hash. Texts the embedder rejects even on their own are left out;
+    transient failures (embedder unavailable, timeouts) raise EmbedderError.
+    """
+    try:
+        embeddings = await get_embeddings(list(texts_by_hash.values()), model)
+        return dict(zip(texts_by_hash.keys(), embeddings))
+    except EmbedderError as e:
+        if not e.permanent:
+            raise
+        if len(texts_by_hash) == 1:
+            logger.error(f"Embedder rejected text {next(iter(texts_by_hash))}: {e}")
+            return {}
+        logger.warning(f"Embedder rejected a batch of {len(texts_by_hash)} texts ({e}), retrying one by one")
+
+    # Fall back to single requests so one bad snippet does not drop the whole batch
+    vectors = {}
+    for key, text in texts_by_hash.items():
+        vectors.update(await embed_texts({key: text}, model))
+    return vectors
+
+async def embed_snippets(snippets: List[Dict[str, Any]], model: Optional[EmbeddingModel] = None, store_code: bool = STORE_CODE_IN_PAYLOAD) -> List[models.PointStruct]:
+    """
+    Embed one batch of snippets and build Qdrant points from them.
+    Identical code is embedded once, and code seen before is taken from the embedding cache.
+    Snippets the embedder rejects get no point; transient embedder failures raise EmbedderError.
+    """
+    model = model or get_embedding_model()
+    hashes = [content_hash(snippet["code"]) for snippet in snippets]
+
+    vectors = {}
+    if embedding_cache is not None:
+        vectors = await asyncio.to_thread(embedding_cache.get_many, model.name, set(hashes))
+
+    missing = {key: snippet["code"] for key, snippet in zip(hashes, snippets) if key not in vectors}
+    if missing:
+        embedded = await embed_texts(missing, model)
+        if embedding_cache is not None:
+            await asyncio.to_thread(embedding_cache.put_many, model.name, embedded)
+        vectors.update(embedded)
+
+    logger.debug(f"Embedded {len(snippets)} snippets: {len(snippets) - len(missing)} cached, {len(missing)} sent to embedder")
+
+    with_lexical = model.collection_name in lexical_collections
+    return [
+        models.PointStruct(
+            id=snippet["id"],
+            vector={"": vectors[key], LEXICAL_VECTOR: document_sparse_vector(snippet["code"])} if with_lexical else vectors[key],
+            payload=snippet_payload(snippet, store_code)
+        )
+        for key, snippet in zip(hashes, snippets)
+        if key in vectors
+    ]
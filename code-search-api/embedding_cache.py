@@ -0,0 +1,70 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache in a local SQLite file, keyed by (model, content hash).
+    Vectors are stored as packed float32, which is also what Qdrant stores.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, content_hash)
+            )
+            """
+        )
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(hashes)
+        result = {}
+        batch_size = 500  # stay below SQLite's bound parameter limit
+        with self._lock:
+            for i in range(0, len(hashes), batch_size):
+                batch = hashes[i:i+batch_size]
+                rows = self._connection.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    (model, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    result[key] = vector.tolist()
+        return result
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        if not vectors:
+            return
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, content_hash, vector) VALUES (?, ?, ?)",
+                    [(model, key, array("f", vector).tobytes()) for key, vector in vectors.items()],
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
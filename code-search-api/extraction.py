@@ -0,0 +1,89 @@
+"""
+Reading and chunking of repository files. Kept free of clients and state files,
+so extraction worker processes can import it cheaply.
+"""
+import logging
+import os
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from chunking import create_chunker
+from config import (
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_LINES,
+    CHUNKER,
+    INDEX_EXCLUDE,
+    INDEX_USE_GITIGNORE,
+    POINT_ID_NAMESPACE,
+    REPOS_DIR,
+)
+from embedding_cache import content_hash
+from repo_walker import ExcludeRules, is_indexable, iter_source_files
+
+logger = logging.getLogger(__name__)
+
+chunker = create_chunker(CHUNKER, max_tokens=CHUNK_MAX_TOKENS, overlap_lines=CHUNK_OVERLAP_LINES)
+
+def snippet_point_id(repo_name: str, file_path: str, line_from: int, line_to: int, code: str) -> str:
+    """Deterministic point id, so reindexing the same chunk overwrites its point instead of duplicating it"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{repo_name}\0{file_path}\0{line_from}\0{line_to}\0{content_hash(code)}"))
+
+def repository_path(repo_name: str) -> str:
+    """Local clone of a GitHub repository"""
+    return os.path.join(REPOS_DIR, repo_name.replace("/", "_"))
+
+def repository_info(repo_path: str, repo_name: str) -> Dict[str, str]:
+    return {
+        "name": repo_name,
+        "path": repo_path,
+        "url": f"github.com/{repo_name}"
+    }
+
+def list_repository_files(repo_path: str, rel_paths: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """
+    Relative paths of the files to index: the whole repository,
+    or only the indexable ones among rel_paths.
+    """
+    exclude_rules = ExcludeRules.for_repository(repo_path, INDEX_EXCLUDE, use_gitignore=INDEX_USE_GITIGNORE)
+
+    if rel_paths is None:
+        return (rel_path for _, rel_path in iter_source_files(repo_path, exclude_rules))
+    return (rel_path for rel_path in rel_paths if is_indexable(rel_path, exclude_rules))
+
+def extract_file_snippets(file_path: str, rel_path: str, repo: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Split one file into snippets"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    return [
+        {
+            "id": snippet_point_id(repo["name"], rel_path, chunk.line_from, chunk.line_to, chunk.code),
+            "code": chunk.code,
+            "file_path": rel_path,
+            "line_from": chunk.line_from,
+            "line_to": chunk.line_to,
+            "repo": repo
+        }
+        for chunk in chunker.chunk(content, rel_path)
+    ]
+
+def read_snippet_code(repo_name: str, file_path: str, line_from: int, line_to: int) -> str:
+    """
+    Code of a snippet read back from the repository clone, for points stored without code.
+    The clone may be ahead of the index while a reindex runs, so the lines can be slightly off until it completes.
+    """
+    with open(os.path.join(repository_path(repo_name), file_path), 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    return '\n'.join(lines[line_from - 1:line_to])
+
+def extract_files_snippets(repo_path: str, repo_name: str, rel_paths: List[str]) -> List[Dict[str, Any]]:
+    """Snippets of a group of files; the unit of work of an extraction worker process"""
+    repo = repository_info(repo_path, repo_name)
+    snippets = []
+    for rel_path in rel_paths:
+        file_path = os.path.join(repo_path, rel_path)
+        try:
+            snippets.extend(extract_file_snippets(file_path, rel_path, repo))
+        except Exception as e:
+            logger.error(f"Error processing file {file_path}: {e}")
+    return snippets
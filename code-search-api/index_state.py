@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+
+class IndexJob(NamedTuple):
+    id: int
+    repos: Optional[List[str]]  # None means every configured repository
+    force: bool  # Reindex from scratch even if a repository is indexed at its current commit
+
+
+class IndexState:
+    """
+    Durable indexing state stored in a local SQLite file.
+    Keeps the last fully indexed commit of every repository per collection,
+    the latest indexing progress, per-file checkpoints of the repositories being
+    indexed and a queue of reindex jobs. The file is shared
+    by the search API and the indexer worker, which may run in different processes.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # Wait for the other process's write lock instead of failing with "database is locked"
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS repositories (
+                collection_name TEXT NOT NULL,
+                repo_name TEXT NOT NULL,
+                commit_sha TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (collection_name, repo_name)
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS status (
+                collection_name TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        # Indexing run of every repository; an unfinished run at the same commit is resumed
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS progress (
+                collection_name TEXT NOT NULL,
+                repo_name TEXT NOT NULL,
+                commit_sha TEXT NOT NULL,
+                state TEXT NOT NULL,
+                files_total INTEGER NOT NULL,
+                files_done INTEGER NOT NULL,
+                chunks INTEGER NOT NULL,
+                run_files_start INTEGER NOT NULL,
+                run_chunks_start INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (collection_name, repo_name)
+            )
+            """
+        )
+        # Files of the current run whose chunks are all in the collection
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                collection_name TEXT NOT NULL,
+                repo_name TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                PRIMARY KEY (collection_name, repo_name, file_path)
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection_name TEXT NOT NULL,
+                repos TEXT,
+                force INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        # Job queues created before forced reindexing existed lack the column
+        job_columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+        if "force" not in job_columns:
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN force INTEGER NOT NULL DEFAULT 0")
+
+    def get_commit(self, collection_name: str, repo_name: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT commit_sha FROM repositories WHERE collection_name = ? AND repo_name = ?",
+                (collection_name, repo_name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_commit(self, collection_name: str, repo_name: str, commit_sha: str):
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO repositories (collection_name, repo_name, commit_sha, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (collection_name, repo_name) DO UPDATE SET commit_sha = excluded.commit_sha, updated_at = excluded.updated_at
+                """,
+                (collection_name, repo_name, commit_sha, time.time()),
+            )
+
+    def get_commits(self, collection_name: str) -> Dict[str, str]:
+        """Last fully indexed commit of every repository of a collection"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT repo_name, commit_sha FROM repositories WHERE collection_name = ?",
+                (collection_name,),
+            ).fetchall()
+        return dict(rows)
+
+    def save_status(self, collection_name: str, status: Dict[str, Any]):
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO status (collection_name, status, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (collection_name) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+                """,
+                (collection_name, json.dumps(status), time.time()),
+            )
+
+    def load_status(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status FROM status WHERE collection_name = ?",
+                (collection_name,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def start_repository(self, collection_name: str, repo_name: str, commit_sha: str, files_total: int, resume: bool = True) -> Set[str]:
+        """
+        Begin indexing a repository at a commit. Resumes an unfinished run at the same commit (unless resume
+        is off) and returns its already indexed files; any other previous run is discarded.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT commit_sha, state, files_done, chunks FROM progress WHERE collection_name = ? AND repo_name = ?",
+                    (collection_name, repo_name),
+                ).fetchone()
+                if resume and row is not None and row[0] == commit_sha and row[1] != "completed":
+                    files_done, chunks = row[2], row[3]
+                    done_files = {
+                        file_path for (file_path,) in self._connection.execute(
+                            "SELECT file_path FROM files WHERE collection_name = ? AND repo_name = ?",
+                            (collection_name, repo_name),
+                        )
+                    }
+                else:
+                    files_done, chunks, done_files = 0, 0, set()
+                    self._connection.execute(
+                        "DELETE FROM files WHERE collection_name = ? AND repo_name = ?",
+                        (collection_name, repo_name),
+                    )
+                self._connection.execute(
+                    """
+                    INSERT OR REPLACE INTO progress (
+                        collection_name, repo_name, commit_sha, state, files_total, files_done, chunks,
+                        run_files_start, run_chunks_start, started_at, updated_at
+                    ) VALUES (?, ?, ?, 'indexing', ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (collection_name, repo_name, commit_sha, files_total, files_done, chunks, files_done, chunks, now, now),
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return done_files
+
+    def mark_files_done(self, collection_name: str, repo_name: str, files: Dict[str, int], chunks: int):
+        """Checkpoint files whose chunks are all upserted ({file path: chunks}) and count the upserted chunks"""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO files (collection_name, repo_name, file_path, chunks) VALUES (?, ?, ?, ?)",
+                    [(collection_name, repo_name, file_path, file_chunks) for file_path, file_chunks in files.items()],
+                )
+                self._connection.execute(
+                    """
+                    UPDATE progress SET files_done = files_done + ?, chunks = chunks + ?, updated_at = ?
+                    WHERE collection_name = ? AND repo_name = ?
+                    """,
+                    (len(files), chunks, time.time(), collection_name, repo_name),
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def finish_repository(self, collection_name: str, repo_name: str, ok: bool = True):
+        """A completed run drops its file checkpoints; a failed one keeps them to be resumed"""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE progress SET state = ?, updated_at = ? WHERE collection_name = ? AND repo_name = ?",
+                ("completed" if ok else "failed", time.time(), collection_name, repo_name),
+            )
+            if ok:
+                self._connection.execute(
+                    "DELETE FROM files WHERE collection_name = ? AND repo_name = ?",
+                    (collection_name, repo_name),
+                )
+
+    def unfinished_repositories(self, collection_name: str) -> Set[str]:
+        """Repositories whose last run was interrupted or failed"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT repo_name FROM progress WHERE collection_name = ? AND state != 'completed'",
+                (collection_name,),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def load_progress(self, collection_name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._connection.execute(
+                """
+                SELECT repo_name, commit_sha, state, files_total, files_done, chunks,
+                       run_files_start, run_chunks_start, started_at, updated_at
+                FROM progress WHERE collection_name = ? ORDER BY repo_name
+                """,
+                (collection_name,),
+            )
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def enqueue_job(self, collection_name: str, repos: Optional[List[str]] = None, force: bool = False) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (collection_name, repos, force, state, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (collection_name, json.dumps(repos) if repos is not None else None, int(force), now, now),
+            )
+        return cursor.lastrowid
+
+    def claim_next_job(self, collection_name: str) -> Optional[IndexJob]:
+        """Mark the oldest queued job as running and return it; safe with several workers"""
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two workers cannot claim the same job
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT id, repos, force FROM jobs WHERE collection_name = ? AND state = 'queued' ORDER BY id LIMIT 1",
+                    (collection_name,),
+                ).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        "UPDATE jobs SET state = 'running', updated_at = ? WHERE id = ?",
+                        (time.time(), row[0]),
+                    )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return IndexJob(row[0], json.loads(row[1]) if row[1] is not None else None, bool(row[2]))
+
+    def finish_job(self, job_id: int, error: Optional[str] = None):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                ("failed" if error else "done", error, time.time(), job_id),
+            )
+
+    def requeue_running_jobs(self, collection_name: str) -> int:
+        """Put jobs left running by a worker that died back into the queue"""
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET state = 'queued', updated_at = ? WHERE collection_name = ? AND state = 'running'",
+                (time.time(), collection_name),
+            )
+        return cursor.rowcount
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, repos, force, state, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "repos": json.loads(row[1]) if row[1] is not None else None,
+            "force": bool(row[2]),
+            "state": row[3],
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,61 @@
+"""
+Indexing worker. Runs separately from the search API (api.py), so cloning, chunking
+and embedding repositories do not compete with /search for the API's event loop and GIL.
+
+    python indexer.py                  # index configured repositories, then serve /reindex jobs
+    python indexer.py --once           # index once and exit
+    python indexer.py --once --repo owner/name
+
+The worker and the API share the collection and the index state file (INDEX_STATE_PATH):
+the worker publishes its progress there for /status and picks up jobs queued by /reindex.
+"""
+import argparse
+import asyncio
+import logging
+
+from prometheus_client import start_http_server
+
+from config import INDEXER_INTERVAL, INDEXER_METRICS_PORT, INDEXER_POLL_INTERVAL
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main(args: argparse.Namespace) -> int:
+    # Imported here rather than at the top: spawned extraction workers re-import this module,
+    # and importing indexing would open the index state and the embedding cache in every worker
+    from collection import qdrant_client
+    from embedder import close_embedder_client, open_embedder_client
+    from indexing import index_state, process_repositories, run_indexing_worker
+
+    if args.metrics_port:
+        # Served from a background thread, so scrapes work while the event loop is busy
+        start_http_server(args.metrics_port)
+    open_embedder_client()
+    try:
+        # Collections are created by process_repositories once the embedders report their dimensions
+        if args.once:
+            error = await process_repositories(args.repo or None)
+            return 1 if error else 0
+
+        await run_indexing_worker(
+            index_on_start=not args.no_initial_index,
+            interval=args.interval,
+            poll_interval=args.poll_interval
+        )
+        return 0
+    finally:
+        await close_embedder_client()
+        await qdrant_client.close()
+        index_state.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index repositories for the code search API")
+    parser.add_argument("--once", action="store_true", help="index once and exit instead of serving reindex jobs")
+    parser.add_argument("--repo", action="append", help="repository to index with --once (repeatable), defaults to the config")
+    parser.add_argument("--no-initial-index", action="store_true", help="only serve queued jobs, skip indexing on start")
+    parser.add_argument("--interval", type=float, default=INDEXER_INTERVAL, help="seconds between periodic reindexes, 0 disables")
+    parser.add_argument("--poll-interval", type=float, default=INDEXER_POLL_INTERVAL, help="seconds between job queue polls")
+    parser.add_argument("--metrics-port", type=int, default=INDEXER_METRICS_PORT, help="port of the Prometheus metrics, 0 disables")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,577 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from git import Repo
+from qdrant_client import models
+
+from collection import qdrant_client
+from config import (
+    COLLECTION_NAME,
+    CONFIG_FILE,
+    EMBED_CONCURRENCY,
+    EXTRACT_FILES_PER_TASK,
+    EXTRACT_WORKERS,
+    INDEX_STATE_PATH,
+    INDEXING_MODE,
+    INDEXING_QUEUE_SIZE,
+    REPOS_DIR,
+)
+from embedder import (
+    EmbeddingModel,
+    check_embedder_available,
+    embed_snippets,
+    embedding_models,
+    ensure_model_collection,
+    get_embedding_model,
+    iter_embedding_batches,
+)
+from extraction import extract_files_snippets, list_repository_files, repository_path
+from index_state import IndexState
+from metrics import INDEXED_CHUNKS, QDRANT_LATENCY, SKIPPED_CHUNKS, track_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Create necessary directories
+os.makedirs(REPOS_DIR, exist_ok=True)
+
+# Indexing progress of this process, published to index_state for the search API
+indexing_status = {"status": "not_started", "skipped_chunks": 0, "error": None}
+
+# Minimal interval between progress writes while batches are being upserted
+STATUS_PUBLISH_INTERVAL = 2.0
+_status_published_at = 0.0
+
+# Last indexed commit of every repository, indexing progress and queued reindex jobs
+index_state = IndexState(INDEX_STATE_PATH)
+
+async def publish_status(force: bool = True):
+    """Store indexing_status where the search API reads it; unforced updates are throttled"""
+    global _status_published_at
+    now = time.monotonic()
+    if not force and now - _status_published_at < STATUS_PUBLISH_INTERVAL:
+        return
+    _status_published_at = now
+    try:
+        await asyncio.to_thread(index_state.save_status, COLLECTION_NAME, dict(indexing_status))
+    except Exception as e:
+        logger.warning(f"Could not publish indexing status: {e}")
+
+async def set_status(status: str, error: Optional[str] = None):
+    indexing_status["status"] = status
+    indexing_status["error"] = error
+    await publish_status()
+
+async def clone_repository(repo_name: str, pull: bool = False) -> str:
+    """Clone a GitHub repository, or pull new commits into an existing clone"""
+    repo_url = f"https://github.com/{repo_name}.git"
+    repo_path = repository_path(repo_name)
+
+    if os.path.exists(repo_path):
+        logger.info(f"Repository {repo_name} already exists at {repo_path}")
+        if pull:
+            logger.info(f"Pulling new commits for {repo_name}")
+            await asyncio.to_thread(Repo(repo_path).remotes.origin.pull, ff_only=True)
+        return repo_path
+
+    logger.info(f"Cloning {repo_name} to {repo_path}")
+    os.makedirs(os.path.dirname(repo_path), exist_ok=True)
+    await asyncio.to_thread(Repo.clone_from, repo_url, repo_path)
+    return repo_path
+
+def diff_repository(repo_path: str, old_sha: str, new_sha: str) -> Tuple[List[str], List[str]]:
+    """Return (added or modified files, removed files) between two commits"""
+    repo = Repo(repo_path)
+    changed, removed = [], []
+
+    for diff in repo.commit(old_sha).diff(repo.commit(new_sha)):
+        if diff.change_type == "D":
+            removed.append(diff.a_path)
+        elif diff.change_type == "R":
+            removed.append(diff.a_path)
+            changed.append(diff.b_path)
+        else:
+            changed.append(diff.b_path)
+
+    return changed, removed
+
+async def delete_repository_points(repo_name: str, file_paths: Optional[List[str]] = None, collection_name: str = COLLECTION_NAME):
+    """Delete points of a repository, or only the points of the given files"""
+    conditions = [models.FieldCondition(key="repo.name", match=models.MatchValue(value=repo_name))]
+
+    if file_paths is None:
+        await qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=conditions)),
+            wait=True
+        )
+        return
+
+    batch_size = 500
+    for i in range(0, len(file_paths), batch_size):
+        file_condition = models.FieldCondition(key="file_path", match=models.MatchAny(any=file_paths[i:i+batch_size]))
+        await qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[*conditions, file_condition])),
+            wait=True
+        )
+
+async def delete_unlisted_points(repo_name: str, file_paths: List[str], collection_name: str = COLLECTION_NAME):
+    """Delete points of a repository's files that are not among file_paths, i.e. files removed from it"""
+    if not file_paths:
+        await delete_repository_points(repo_name, collection_name=collection_name)
+        return
+    await qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(filter=models.Filter(
+            must=[models.FieldCondition(key="repo.name", match=models.MatchValue(value=repo_name))],
+            must_not=[models.FieldCondition(key="file_path", match=models.MatchAny(any=file_paths))],
+        )),
+        wait=True
+    )
+
+async def delete_replaced_points(repo_name: str, point_ids: Dict[str, List[str]], collection_name: str = COLLECTION_NAME, wait: bool = False):
+    """
+    Delete points of reindexed files ({file path: ids of its current points}) that are not among their
+    current points: chunks of an older version of the file. Called once the current points are upserted,
+    so a file stays searchable while it is reindexed.
+    """
+    if not point_ids:
+        return
+    await qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(filter=models.Filter(
+            must=[models.FieldCondition(key="repo.name", match=models.MatchValue(value=repo_name))],
+            should=[
+                models.Filter(
+                    must=[models.FieldCondition(key="file_path", match=models.MatchValue(value=file_path))],
+                    must_not=[models.HasIdCondition(has_id=ids)] if ids else None,
+                )
+                for file_path, ids in point_ids.items()
+            ],
+        )),
+        wait=wait
+    )
+
+class RepositoryIndexJob:
+    """
+    Tracks the batches of one repository through the pipeline. The indexed commit is
+    stored only after every batch has been upserted, so a failed run is retried next time.
+    Files are checkpointed as soon as all their chunks are upserted, and a retry at the
+    same commit skips them. Chunks the embedder rejects count as done, so they cannot
+    hold back the repository forever.
+    """
+
+    def __init__(self, repo_name: str, commit_sha: str, model: EmbeddingModel):
+        self.repo_name = repo_name
+        self.commit_sha = commit_sha
+        self.model = model
+        self.pending_batches = 0
+        self.all_batches_queued = False
+        self.failed = False
+        # Chunks of every extracted file that are not upserted (or skipped) yet
+        self.pending_chunks: Dict[str, int] = {}
+        self.file_chunks: Dict[str, int] = {}
+        # Point ids of the files being indexed, to delete their other points once they are done
+        self.point_ids: Dict[str, List[str]] = {}
+
+    def files_extracted(self, file_paths: List[str], snippets: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Register the chunks of extracted files; returns the files without chunks, which are done already"""
+        counts = Counter(snippet["file_path"] for snippet in snippets)
+        for file_path in file_paths:
+            self.pending_chunks[file_path] = self.file_chunks[file_path] = counts[file_path]
+            self.point_ids[file_path] = []
+        for snippet in snippets:
+            self.point_ids[snippet["file_path"]].append(snippet["id"])
+        return {file_path: 0 for file_path in file_paths if not counts[file_path]}
+
+    def pop_point_ids(self, file_paths: Iterable[str]) -> Dict[str, List[str]]:
+        """Point ids of files that are done"""
+        return {file_path: self.point_ids.pop(file_path) for file_path in file_paths}
+
+    def chunks_done(self, file_paths: List[str]) -> Dict[str, int]:
+        """Count upserted or skipped chunks (by file path) against their files; returns the files that are complete now"""
+        done = {}
+        for file_path in file_paths:
+            self.pending_chunks[file_path] -= 1
+            if self.pending_chunks[file_path] == 0:
+                done[file_path] = self.file_chunks[file_path]
+        return done
+
+    def is_last_batch(self) -> bool:
+        return self.all_batches_queued and self.pending_batches == 1
+
+    def batch_done(self, ok: bool = True):
+        self.pending_batches -= 1
+        self.failed = self.failed or not ok
+        self.complete_if_done()
+
+    def complete_if_done(self):
+        if not self.all_batches_queued or self.pending_batches > 0:
+            return
+        if self.failed:
+            index_state.finish_repository(self.model.collection_name, self.repo_name, ok=False)
+            logger.warning(f"Indexing of {self.repo_name} at {self.commit_sha} for {self.model.name} had errors, it will be retried on the next run")
+            return
+        index_state.set_commit(self.model.collection_name, self.repo_name, self.commit_sha)
+        index_state.finish_repository(self.model.collection_name, self.repo_name)
+        logger.info(f"Repository {self.repo_name} indexed at commit {self.commit_sha} for {self.model.name}")
+
+def extraction_worker_count() -> int:
+    return EXTRACT_WORKERS or os.cpu_count() or 1
+
+def create_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """Worker processes for reading and chunking files, or None to extract in a thread of this process"""
+    workers = extraction_worker_count()
+    if workers <= 1:
+        return None
+    # Spawned rather than forked: forked children would inherit the parent's gRPC channels and SQLite connections.
+    # Spawned children import only extraction and the main module, which is why indexer.py imports indexing in main()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+async def iter_repository_snippets(repo_path: str, repo_name: str, files: List[str], executor: Optional[ProcessPoolExecutor]) -> AsyncIterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """
+    Yield (files, their snippets) of a repository in groups, without blocking the event loop.
+    With an executor, groups of EXTRACT_FILES_PER_TASK files are chunked in parallel by the
+    worker processes and yielded as they complete, in no particular order. At most two groups
+    per worker are in flight, so a slow consumer does not pile up extracted snippets.
+    """
+    if executor is None:
+        # Stream file by file; files are read in a worker thread one at a time
+        for rel_path in files:
+            yield [rel_path], await asyncio.to_thread(extract_files_snippets, repo_path, repo_name, [rel_path])
+        return
+
+    loop = asyncio.get_running_loop()
+    groups = (files[i:i+EXTRACT_FILES_PER_TASK] for i in range(0, len(files), EXTRACT_FILES_PER_TASK))
+    max_in_flight = extraction_worker_count() * 2
+    in_flight = {}
+
+    try:
+        for group in groups:
+            if len(in_flight) >= max_in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+            in_flight[loop.run_in_executor(executor, extract_files_snippets, repo_path, repo_name, group)] = group
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+# Indexing pipeline: producer -> embed workers -> upsert worker.
+# Bounded queues give backpressure, so a slow stage pauses the stages before it.
+async def produce_snippet_batches(repo_names: List[str], model: EmbeddingModel, embed_queue: asyncio.Queue, executor: Optional[ProcessPoolExecutor] = None, force: bool = False) -> Tuple[List[RepositoryIndexJob], List[str]]:
+    """
+    Clone repositories, extract snippets and feed embedding batches into the queue.
+    With force, repositories are reindexed in full even if they are indexed at their current commit.
+    Returns the jobs of the repositories being indexed and the repositories that failed before their batches were queued.
+    """
+    incremental = INDEXING_MODE == "incremental"
+    jobs, failed = [], []
+
+    for repo_name in repo_names:
+        try:
+            # Clone repository or pull new commits
+            repo_path = await clone_repository(repo_name, pull=incremental)
+            commit_sha = Repo(repo_path).head.commit.hexsha
+            job = RepositoryIndexJob(repo_name, commit_sha, model)
+
+            rel_paths, removed_paths = None, None
+            last_sha = index_state.get_commit(model.collection_name, repo_name) if incremental and not force else None
+            if last_sha == commit_sha:
+                logger.info(f"Repository {repo_name} is up to date at {commit_sha}")
+                continue
+            elif last_sha:
+                try:
+                    changed, removed = await asyncio.to_thread(diff_repository, repo_path, last_sha, commit_sha)
+                    logger.info(f"{repo_name} {last_sha[:8]}..{commit_sha[:8]}: {len(changed)} changed and {len(removed)} removed files")
+                    # Points of modified files are replaced, points of removed files are dropped
+                    rel_paths, removed_paths = changed, removed
+                except Exception as e:
+                    logger.warning(f"Could not diff {repo_name} against {last_sha} ({e}), reindexing the whole repository")
+
+            files = await asyncio.to_thread(lambda: list(list_repository_files(repo_path, rel_paths)))
+            # A forced run reindexes from scratch instead of resuming an interrupted one
+            done_files = await asyncio.to_thread(
+                index_state.start_repository, model.collection_name, repo_name, commit_sha, len(files), not force
+            )
+            # Nothing is deleted up front, so the repository stays searchable while it is reindexed: files
+            # are upserted over their points (ids are deterministic), then their outdated points are deleted
+            if removed_paths is not None:
+                await delete_repository_points(repo_name, removed_paths, model.collection_name)
+            else:
+                await delete_unlisted_points(repo_name, files, model.collection_name)
+            if done_files:
+                # Files of the interrupted run are checkpointed after their outdated points were deleted
+                logger.info(f"Resuming {repo_name} at {commit_sha[:8]}: {len(done_files)} of {len(files)} files already indexed")
+                files = [file_path for file_path in files if file_path not in done_files]
+
+            logger.info(f"Extracting code from {len(files)} files of {repo_name}")
+            snippets_count = 0
+            pending = []
+            async for file_paths, snippets in iter_repository_snippets(repo_path, repo_name, files, executor):
+                empty_files = job.files_extracted(file_paths, snippets)
+                if empty_files:
+                    await delete_replaced_points(repo_name, job.pop_point_ids(empty_files), model.collection_name)
+                    await asyncio.to_thread(index_state.mark_files_done, model.collection_name, repo_name, empty_files, 0)
+                # Snippets arrive in groups of files; the last, possibly partial batch waits for the next group
+                pending.extend(snippets)
+                if not pending:
+                    continue
+                batches = list(iter_embedding_batches(pending))
+                pending = batches.pop()
+                for batch in batches:
+                    snippets_count += len(batch)
+                    job.pending_batches += 1
+                    await embed_queue.put((job, batch))
+            if pending:
+                snippets_count += len(pending)
+                job.pending_batches += 1
+                await embed_queue.put((job, pending))
+            logger.info(f"Found {snippets_count} code snippets in {repo_name}")
+
+            job.all_batches_queued = True
+            job.complete_if_done()
+            jobs.append(job)
+
+        except Exception as e:
+            logger.error(f"Error processing repository {repo_name}: {e}")
+            failed.append(repo_name)
+
+    return jobs, failed
+
+async def embed_worker(embed_queue: asyncio.Queue, upsert_queue: asyncio.Queue):
+    """Embed snippet batches; the number of workers bounds in-flight embedder requests"""
+    while True:
+        item = await embed_queue.get()
+        if item is None:
+            return
+
+        job, batch = item
+        try:
+            points = await embed_snippets(batch, job.model)
+        except Exception as e:
+            # Transient failure: the batch's files are not checkpointed and the next run embeds them again
+            logger.error(f"Error embedding batch of {len(batch)} snippets: {e}")
+            job.batch_done(ok=False)
+            continue
+
+        # Snippets the embedder rejected even on their own would fail on every run, they are skipped
+        embedded_ids = {point.id for point in points}
+        skipped = [snippet for snippet in batch if snippet["id"] not in embedded_ids]
+        if skipped:
+            skipped_files = sorted({snippet["file_path"] for snippet in skipped})
+            logger.warning(f"Skipping {len(skipped)} snippets of {job.repo_name} rejected by the embedder: {', '.join(skipped_files)}")
+
+        await upsert_queue.put((job, points, skipped))
+
+async def upsert_worker(upsert_queue: asyncio.Queue):
+    """
+    Write embedded points to Qdrant without waiting for them to be applied.
+    Qdrant applies the updates of a collection in order, so the last batch of a repository
+    is upserted with wait=True: once it returns, every earlier batch has been applied as well
+    and the repository's commit can be stored.
+    """
+    while True:
+        item = await upsert_queue.get()
+        if item is None:
+            return
+
+        job, points, skipped = item
+        try:
+            if points:
+                with QDRANT_LATENCY.labels("upsert").time():
+                    await qdrant_client.upsert(
+                        collection_name=job.model.collection_name,
+                        points=points,
+                        wait=job.is_last_batch()
+                    )
+        except Exception as e:
+            logger.error(f"Error upserting {len(points)} points: {e}")
+            job.batch_done(ok=False)
+            continue
+
+        indexing_status["skipped_chunks"] += len(skipped)
+        INDEXED_CHUNKS.labels(job.model.collection_name).inc(len(points))
+        SKIPPED_CHUNKS.labels(job.model.collection_name).inc(len(skipped))
+        done_files = job.chunks_done([point.payload["file_path"] for point in points] + [snippet["file_path"] for snippet in skipped])
+        try:
+            # Chunks of older versions of the completed files are deleted before they are checkpointed
+            await delete_replaced_points(job.repo_name, job.pop_point_ids(done_files), job.model.collection_name, wait=job.is_last_batch())
+        except Exception as e:
+            logger.error(f"Error deleting outdated points of {job.repo_name}: {e}")
+            job.batch_done(ok=False)
+            continue
+        try:
+            # Qdrant has the batch in its write-ahead log once the upsert returns, even with wait=False
+            await asyncio.to_thread(
+                index_state.mark_files_done,
+                job.model.collection_name, job.repo_name, done_files, len(points)
+            )
+        except Exception as e:
+            logger.warning(f"Could not checkpoint files of {job.repo_name}: {e}")
+        job.batch_done()
+        await publish_status(force=False)
+
+async def run_indexing_pipeline(repo_names: List[str], model: Optional[EmbeddingModel] = None, force: bool = False) -> List[str]:
+    """Index repositories with one embedding model; returns the repositories that failed"""
+    embed_queue = asyncio.Queue(maxsize=INDEXING_QUEUE_SIZE)
+    upsert_queue = asyncio.Queue(maxsize=INDEXING_QUEUE_SIZE)
+    track_queue_depth("embed", embed_queue)
+    track_queue_depth("upsert", upsert_queue)
+
+    embedders = [
+        asyncio.create_task(embed_worker(embed_queue, upsert_queue))
+        for _ in range(EMBED_CONCURRENCY)
+    ]
+    upserter = asyncio.create_task(upsert_worker(upsert_queue))
+    executor = create_extraction_pool()
+
+    try:
+        jobs, failed = await produce_snippet_batches(repo_names, model or get_embedding_model(), embed_queue, executor, force)
+
+        # Drain the pipeline stage by stage
+        for _ in embedders:
+            await embed_queue.put(None)
+        await asyncio.gather(*embedders)
+        await upsert_queue.put(None)
+        await upserter
+        # Every batch is done now, so every job has completed or failed
+        return failed + [job.repo_name for job in jobs if job.failed]
+    finally:
+        for task in [*embedders, upserter]:
+            task.cancel()
+        track_queue_depth("embed", None)
+        track_queue_depth("upsert", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def load_repository_names() -> List[str]:
+    """GitHub repositories listed in the repositories config"""
+    with open(CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+
+    repo_names = []
+    for repo_config in config['repos']:
+        if repo_config['type'] == 'github':
+            repo_names.extend(repo_config['repos'])
+    return repo_names
+
+async def is_populated(model: EmbeddingModel) -> bool:
+    try:
+        collection_info = await qdrant_client.get_collection(model.collection_name)
+        return collection_info.points_count > 0
+    except Exception as e:
+        logger.error(f"Error checking collection: {e}")
+    return False
+
+async def pending_repositories(model: EmbeddingModel, repo_names: List[str]) -> List[str]:
+    """
+    Repositories a populated collection is still missing: never fully indexed, or interrupted
+    halfway (those are resumed from their checkpoints). Every repository if the collection is empty.
+    """
+    if not await is_populated(model):
+        return repo_names
+    unfinished = await asyncio.to_thread(index_state.unfinished_repositories, model.collection_name)
+    pending = [
+        repo_name for repo_name in repo_names
+        if repo_name in unfinished or index_state.get_commit(model.collection_name, repo_name) is None
+    ]
+    if pending:
+        logger.info(f"Collection {model.collection_name} is populated, but {len(pending)} repositories are incomplete: {', '.join(pending)}")
+    else:
+        logger.info(f"Collection {model.collection_name} already contains every repository. Skipping indexing.")
+    return pending
+
+async def process_repositories(repo_names: Optional[List[str]] = None, skip_if_populated: bool = INDEXING_MODE == "skip_if_populated", force: bool = False) -> Optional[str]:
+    """
+    Index the given repositories, or every configured repository, with every registered embedding model.
+    With force, repositories already indexed at their current commit are reindexed too.
+    Returns the error that stopped indexing or the repositories that failed to index, if any.
+    """
+    try:
+        if repo_names is None:
+            repo_names = load_repository_names()
+
+        repos_by_model = {model: repo_names for model in embedding_models.values()}
+        # Skip what the collections already have, but finish repositories left incomplete by a crash
+        if skip_if_populated:
+            repos_by_model = {model: await pending_repositories(model, repo_names) for model in embedding_models.values()}
+            if not any(repos_by_model.values()):
+                await set_status("completed")
+                return None
+
+        # Wait for the embedders to be ready (no timeout)
+        await set_status("waiting_for_embedder")
+        for model in embedding_models.values():
+            while True:
+                try:
+                    if await check_embedder_available(model):
+                        logger.info(f"Embedder service of {model.name} is available")
+                        break
+                except Exception as e:
+                    logger.info(f"Waiting for embedder service of {model.name}...")
+                await asyncio.sleep(5)
+
+        indexing_status["skipped_chunks"] = 0
+        await set_status("indexing")
+
+        failed = []
+        for model, model_repo_names in repos_by_model.items():
+            # Collections of new models are created with the dimension reported by their embedder
+            if not await ensure_model_collection(model):
+                raise RuntimeError(f"Could not create the collection of {model.name}")
+            if not model_repo_names:
+                continue
+            indexing_status["model"] = model.name
+            failed.extend(f"{repo_name} ({model.name})" for repo_name in await run_indexing_pipeline(model_repo_names, model, force))
+
+        if failed:
+            # Failed repositories are retried on the next run; the others are indexed
+            error = f"Indexing failed for {', '.join(failed)}"
+            logger.error(error)
+            await set_status("error", error)
+            return error
+        await set_status("completed")
+        return None
+
+    except Exception as e:
+        logger.error(f"Indexing error: {e}")
+        await set_status("error", str(e))
+        return str(e)
+
+async def run_indexing_worker(index_on_start: bool = True, interval: float = 0, poll_interval: float = 5):
+    """
+    Index every configured repository, then serve reindex jobs queued through the API.
+    With interval > 0 the configured repositories are also reindexed periodically.
+    """
+    requeued = await asyncio.to_thread(index_state.requeue_running_jobs, COLLECTION_NAME)
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted reindex jobs")
+
+    if index_on_start:
+        await process_repositories()
+    next_run = time.monotonic() + interval if interval > 0 else None
+
+    while True:
+        job = await asyncio.to_thread(index_state.claim_next_job, COLLECTION_NAME)
+        if job is not None:
+            logger.info(f"Running {'forced ' if job.force else ''}reindex job {job.id} for {job.repos or 'all repositories'}")
+            error = await process_repositories(job.repos, skip_if_populated=False, force=job.force)
+            await asyncio.to_thread(index_state.finish_job, job.id, error)
+        elif next_run is not None and time.monotonic() >= next_run:
+            await process_repositories(skip_if_populated=False)
+            next_run = time.monotonic() + interval
+        else:
+            await asyncio.sleep(poll_interval)
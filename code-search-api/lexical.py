@@ -0,0 +1,60 @@
+"""
+Sparse lexical vectors for hybrid search. Chunks are tokenized into identifiers and their
+parts (getUserName -> getusername, get, user, name) and weighted with BM25 term frequency
+saturation; Qdrant applies the IDF part itself (sparse vector modifier "idf").
+"""
+import re
+import zlib
+from collections import Counter
+from typing import List
+
+from qdrant_client import models
+
+# BM25 parameters; the average chunk length is a fixed estimate instead of a corpus statistic,
+# so a chunk's vector does not depend on the rest of the collection
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_TOKENS = 150
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize_code(text: str) -> List[str]:
+    """Lowercased identifiers, plus their camelCase and snake_case parts when they have several"""
+    tokens = []
+    for identifier in _IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        if len(lowered) > 1:
+            tokens.append(lowered)
+        parts = _WORD.findall(identifier)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts if len(part) > 1)
+    return tokens
+
+
+def token_index(token: str) -> int:
+    """Stable across processes and runs, unlike hash()"""
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _sparse_vector(weights: Counter) -> models.SparseVector:
+    # Distinct tokens can share an index, their weights are added up
+    by_index = Counter()
+    for token, weight in weights.items():
+        by_index[token_index(token)] += weight
+    indices = sorted(by_index)
+    return models.SparseVector(indices=indices, values=[float(by_index[index]) for index in indices])
+
+
+def document_sparse_vector(text: str) -> models.SparseVector:
+    tokens = tokenize_code(text)
+    length_norm = 1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_TOKENS
+    return _sparse_vector(Counter({
+        token: tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+        for token, tf in Counter(tokens).items()
+    }))
+
+
+def query_sparse_vector(text: str) -> models.SparseVector:
+    return _sparse_vector(Counter({token: 1.0 for token in tokenize_code(text)}))
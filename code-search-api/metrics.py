@@ -0,0 +1,43 @@
+"""
+Prometheus metrics of the search API and the indexer. The API serves them on /metrics;
+the indexer worker, a separate process, on its own port (INDEXER_METRICS_PORT).
+"""
+import asyncio
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets from 5 ms to 30 s: query embeddings and searches are milliseconds, indexing batches seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+EMBEDDER_LATENCY = Histogram(
+    "code_search_embedder_request_seconds", "Latency of embedder requests", ["model"], buckets=LATENCY_BUCKETS
+)
+EMBEDDER_REQUESTS = Counter("code_search_embedder_requests", "Embedder requests", ["model"])
+EMBEDDER_ERRORS = Counter("code_search_embedder_errors", "Failed embedder requests", ["model"])
+EMBEDDER_INPUTS = Counter("code_search_embedder_inputs", "Texts sent to the embedder", ["model"])
+EMBEDDER_TOKENS = Counter("code_search_embedder_tokens", "Tokens embedded, as reported by the embedder or estimated", ["model"])
+EMBEDDER_IN_PROGRESS = Gauge("code_search_embedder_requests_in_progress", "Embedder requests in flight", ["model"])
+
+QDRANT_LATENCY = Histogram(
+    "code_search_qdrant_request_seconds", "Latency of Qdrant requests", ["operation"], buckets=LATENCY_BUCKETS
+)
+
+SEARCH_LATENCY = Histogram(
+    "code_search_search_seconds", "End-to-end latency of search endpoints", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+RERANK_LATENCY = Histogram("code_search_rerank_seconds", "Latency of reranking one search", buckets=LATENCY_BUCKETS)
+RERANK_FALLBACKS = Counter(
+    "code_search_rerank_fallbacks", "Searches returned in retrieval order instead of reranked", ["reason"]
+)
+
+HTTP_IN_PROGRESS = Gauge("code_search_http_requests_in_progress", "API requests being served")
+
+INDEXING_QUEUE_DEPTH = Gauge("code_search_indexing_queue_depth", "Batches waiting in an indexing pipeline queue", ["queue"])
+INDEXED_CHUNKS = Counter("code_search_indexed_chunks", "Chunks upserted by the indexing pipeline", ["collection"])
+SKIPPED_CHUNKS = Counter("code_search_skipped_chunks", "Chunks the embedder rejected, left out of the index", ["collection"])
+
+
+def track_queue_depth(name: str, queue: Optional[asyncio.Queue]):
+    """Report the depth of a pipeline queue while it exists, and 0 once it is gone"""
+    INDEXING_QUEUE_DEPTH.labels(name).set_function(queue.qsize if queue is not None else (lambda: 0))
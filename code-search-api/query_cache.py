@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import re
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Queries differing only in surrounding or repeated whitespace share one cache entry"""
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class RedisEmbeddingStore:
+    """Shared query embedding store in Redis, so several API replicas reuse each other's embeddings"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "code-search:query-embedding"):
+        # Optional dependency, only needed when a shared cache is configured
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._ttl = int(ttl)
+        self._prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        blob = await self._redis.get(self._key(key))
+        if blob is None:
+            return None
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    async def set(self, key: str, vector: List[float]):
+        await self._redis.set(self._key(key), array("f", vector).tobytes(), ex=self._ttl)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded in-process LRU cache of query embeddings with a TTL,
+    optionally backed by a shared store consulted on local misses.
+    """
+
+    def __init__(self, max_size: int, ttl: float, shared: Optional[RedisEmbeddingStore] = None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, vector = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            del self._entries[key]
+
+        if self._shared is not None:
+            try:
+                vector = await self._shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared query cache lookup failed: {e}")
+                vector = None
+            if vector is not None:
+                self.shared_hits += 1
+                self._put_local(key, vector)
+                return vector
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, vector: List[float]):
+        self._put_local(key, vector)
+        if self._shared is not None:
+            try:
+                await self._shared.set(key, vector)
+            except Exception as e:
+                logger.warning(f"Shared query cache update failed: {e}")
+
+    def _put_local(self, key: str, vector: List[float]):
+        if self._max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self._ttl, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+    async def close(self):
+        if self._shared is not None:
+            await self._shared.close()
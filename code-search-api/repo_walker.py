@@ -0,0 +1,176 @@
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple
+
+# Language of every indexed file extension
+LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.hpp': 'cpp',
+    '.h': 'c',
+    '.c': 'c',
+    '.cs': 'csharp',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.php': 'php',
+    '.rb': 'ruby',
+}
+
+# File extensions that are indexed
+CODE_EXTENSIONS = frozenset(LANGUAGES)
+
+# Directories that are never descended into
+IGNORED_DIRS = frozenset({'__pycache__', 'node_modules', '.git'})
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) into a regex body"""
+    result = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            result.append("/.*")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return "".join(result)
+
+
+class ExcludeRules:
+    """
+    Subset of .gitignore semantics for paths relative to the repository root:
+    `#` comments, `!` negation, trailing `/` for directories only, patterns with a
+    `/` anchored to the root, patterns without one matched at any depth, and
+    `*`, `?`, `[...]`, `**` wildcards. The last matching rule wins.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._rules: List[Tuple[Pattern, bool, bool]] = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str):
+        pattern = pattern.rstrip("\n").rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            return
+
+        if "/" in pattern:
+            regex = "^" + _translate_glob(pattern.lstrip("/")) + "$"
+        else:
+            regex = "^(?:.*/)?" + _translate_glob(pattern) + "$"
+        self._rules.append((re.compile(regex), negate, dir_only))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def is_excluded(self, rel_path: str, is_dir: bool) -> bool:
+        excluded = False
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                excluded = not negate
+        return excluded
+
+    @classmethod
+    def for_repository(cls, repo_path: str, patterns: Iterable[str] = (), use_gitignore: bool = True) -> 'ExcludeRules':
+        """Rules from the repository's root .gitignore followed by the configured patterns"""
+        rules = cls()
+        gitignore_path = os.path.join(repo_path, ".gitignore")
+        if use_gitignore and os.path.isfile(gitignore_path):
+            with open(gitignore_path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    rules.add(line)
+        for pattern in patterns:
+            rules.add(pattern)
+        return rules
+
+
+def iter_source_files(repo_path: str, exclude_rules: Optional[ExcludeRules] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Walk the repository once and yield (absolute path, relative path) of every code file.
+    Ignored and excluded directories are pruned before descending into them.
+    """
+    exclude_rules = exclude_rules or ExcludeRules()
+    stack = [(repo_path, "")]
+
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in IGNORED_DIRS or (exclude_rules and exclude_rules.is_excluded(rel_path, True)):
+                            continue
+                        stack.append((entry.path, rel_path))
+                    elif entry.is_file(follow_symlinks=False):
+                        if os.path.splitext(entry.name)[1] not in CODE_EXTENSIONS:
+                            continue
+                        if exclude_rules and exclude_rules.is_excluded(rel_path, False):
+                            continue
+                        yield entry.path, rel_path
+                except OSError:
+                    continue
+
+
+def is_indexable(rel_path: str, exclude_rules: Optional[ExcludeRules] = None) -> bool:
+    """Check a single relative path (e.g. from a git diff) against the same rules as iter_source_files"""
+    parts = rel_path.split("/")
+    if os.path.splitext(parts[-1])[1] not in CODE_EXTENSIONS:
+        return False
+    for depth, name in enumerate(parts[:-1], start=1):
+        if name in IGNORED_DIRS:
+            return False
+        if exclude_rules and exclude_rules.is_excluded("/".join(parts[:depth]), True):
+            return False
+    return not (exclude_rules and exclude_rules.is_excluded(rel_path, False))
+
+
+def language_of(rel_path: str) -> Optional[str]:
+    return LANGUAGES.get(os.path.splitext(rel_path)[1])
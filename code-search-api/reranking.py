@@ -0,0 +1,93 @@
+"""
+Rerankers rescore the candidates of a search: score(query, documents) returns one score
+per document, higher is better. Documents are passed in retrieval order.
+"""
+import asyncio
+import math
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+from lexical import tokenize_code
+
+# Rank constant of reciprocal rank fusion
+RRF_K = 60
+
+
+class LexicalReranker:
+    """
+    Cheap stand-in for a cross-encoder: BM25 of the query tokens over the candidates
+    (IDF computed on the candidate set), fused with the retrieval order by reciprocal rank
+    fusion, so candidates without lexical overlap keep their relative order.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        # Tokenizing fifty chunks takes a few milliseconds, keep it off the event loop
+        return await asyncio.to_thread(self.score_sync, query, documents)
+
+    def score_sync(self, query: str, documents: List[str]) -> List[float]:
+        query_tokens = set(tokenize_code(query))
+        if not query_tokens or not documents:
+            return [0.0] * len(documents)
+
+        counts = [Counter(tokenize_code(document)) for document in documents]
+        lengths = [sum(count.values()) for count in counts]
+        avg_length = sum(lengths) / len(lengths) or 1
+        document_frequency = Counter(token for count in counts for token in query_tokens if token in count)
+
+        bm25 = []
+        for count, length in zip(counts, lengths):
+            score = 0.0
+            for token in query_tokens:
+                tf = count.get(token, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (len(documents) - document_frequency[token] + 0.5) / (document_frequency[token] + 0.5))
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+            bm25.append(score)
+
+        lexical_rank = {index: rank for rank, index in enumerate(sorted(range(len(documents)), key=lambda i: -bm25[i]))}
+        return [
+            1 / (RRF_K + retrieval_rank) + (1 / (RRF_K + lexical_rank[retrieval_rank]) if bm25[retrieval_rank] > 0 else 0.0)
+            for retrieval_rank in range(len(documents))
+        ]
+
+
+class HttpReranker:
+    """
+    Cross-encoder served over HTTP with the Cohere/Jina-style rerank API,
+    e.g. vLLM's /v1/rerank or text-embeddings-inference's /rerank.
+    """
+
+    def __init__(self, url: str, model: Optional[str], client: httpx.AsyncClient):
+        self.url = url
+        self.model = model
+        self.client = client
+
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        response = await self.client.post(
+            self.url,
+            json={"model": self.model, "query": query, "documents": documents, "top_n": len(documents)}
+        )
+        response.raise_for_status()
+        scores = [0.0] * len(documents)
+        for result in response.json()["results"]:
+            scores[result["index"]] = result["relevance_score"]
+        return scores
+
+
+def create_reranker(name: str, url: Optional[str] = None, model: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
+    if not name:
+        return None
+    if name == "lexical":
+        return LexicalReranker()
+    if name == "http":
+        if not url or client is None:
+            raise ValueError("The http reranker needs RERANKER_URL")
+        return HttpReranker(url, model, client)
+    raise ValueError(f"Unknown reranker '{name}', expected 'lexical' or 'http'")
@@ -2,6 +2,7 @@ from typing import List
 
 from langchain_core.tools import StructuredTool
 
+from agentic.tool_cache import cache_tools
 from .tools import (
     inspect_tool,
     exact_search_tool,
@@ -174,11 +175,12 @@ CODE_WIZARD_SYSTEM_PROMPT: str = (
 
 
 # Create the manager agent using prebuild create_react_agent. Reade more about it here: https://langchain-ai.github.io/langgraph/reference/prebuilt/#langgraph.prebuilt.chat_agent_executor.create_react_agent
-# For more flexible tool execution and node routing inside agent it is bette to implement your own ToolNode and ToolEdge. Here are som good starting points:
+# Its tools node is agentic/graph.py's ParallelToolNode, a ToolNode with a concurrency limit and per-tool timeouts. Good starting points on custom tool nodes:
 # - https://langchain-ai.github.io/langgraph/tutorials/introduction/#part-2-enhancing-the-chatbot-with-tools
 # - https://langchain-ai.github.io/langgraph/how-tos/tool-calling/
-code_wizard_tools: List[StructuredTool] = [
+# Tool results are shared by every conversation of the process, see agentic/tool_cache.py
+code_wizard_tools: List[StructuredTool] = cache_tools([
     inspect_tool,
     exact_search_tool,
     semantic_search_tool,
-]
+])
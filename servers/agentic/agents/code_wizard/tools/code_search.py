@@ -1,4 +1,5 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
 
 from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
@@ -10,6 +11,9 @@ from sourcebot.sourcebot_client import SourcebotClient, SourcebotApiError
 # Configure API URLs with default values
 SEARCH_API_URL = settings.code_search.SEARCH_API_URL
 SOURCEBOT_URL = settings.code_search.SOURCEBOT_URL
+SEMANTIC_SEARCH_BATCH_WINDOW = settings.code_search.SEMANTIC_SEARCH_BATCH_WINDOW_MS / 1000
+SEMANTIC_SEARCH_MODE = settings.code_search.SEMANTIC_SEARCH_MODE
+SEMANTIC_SEARCH_TOP_N = settings.code_search.SEMANTIC_SEARCH_TOP_N
 
 
 class ExactSearchQuery(BaseModel):
@@ -17,7 +21,7 @@ class ExactSearchQuery(BaseModel):
 
     query: str = Field(description="Поисковый запрос для поиска по кодовой базе")
     allowed_repos: Optional[List[str]] = Field(
-        description="Список репозиториев, по которым ведется поиск. Пустой список ('[]') будет означать поиск без ограничений.", default=[]
+        description="Список репозиториев, по которым ведется поиск. Пустой список ('[]') будет означать поиск без ограничений.", default=None
     )
 
 
@@ -26,7 +30,7 @@ class SemanticSearchQuery(BaseModel):
 
     query: str = Field(description="Поисковый запрос для векторного поиска по кодовой базе")
     allowed_repos: Optional[List[str]] = Field(
-        description="Список репозиториев, по которым ведется поиск. Пустой список ('[]') будет означать поиск без ограничений.", default=[]
+        description="Список репозиториев, по которым ведется поиск. Пустой список ('[]') будет означать поиск без ограничений.", default=None
     )
 
 
@@ -151,15 +155,72 @@ def format_search_results(snippets: List[Dict]) -> str:
     return "\n".join(result_parts)
 
 
+class SemanticSearchBatcher:
+    """
+    Collects semantic searches started within a short window (e.g. several SemanticSearch
+    calls of one agent step) and sends them to the Search API as one /search/batch request.
+    """
+
+    def __init__(self, window: float):
+        self._window = window
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def search(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((query, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._window)
+        pending, self._pending, self._flush_task = self._pending, [], None
+
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(
+                    f"{SEARCH_API_URL}/search/batch",
+                    json={"queries": [query for query, _ in pending]},
+                )
+
+                if response.status_code != 200:
+                    error_detail = response.json().get("detail", str(response.text))
+                    raise Exception(
+                        f"Search API error (Status {response.status_code}): {error_detail}"
+                    )
+
+                results = response.json()["results"]
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+semantic_search_batcher = SemanticSearchBatcher(SEMANTIC_SEARCH_BATCH_WINDOW)
+
+
 async def semantic_search(query: str, allowed_repos: Optional[List[str]] = None) -> str:
     # Ensure allowed_repos is always a list
     allowed_repos = allowed_repos or []
     """A tool for searching for a semantic query in the code"""
+    search_query = {"query": query, "allowed_repos": allowed_repos, "top_n": SEMANTIC_SEARCH_TOP_N}
+    if SEMANTIC_SEARCH_MODE:
+        search_query["mode"] = SEMANTIC_SEARCH_MODE
     try:
+        if SEMANTIC_SEARCH_BATCH_WINDOW > 0:
+            result = await semantic_search_batcher.search(search_query)
+            return format_search_results(result["snippets"])
+
         async with httpx.AsyncClient(timeout=30.0) as client:
             response = await client.post(
                 f"{SEARCH_API_URL}/search",
-                json={"query": query, "allowed_repos": allowed_repos, "top_n": 10},
+                json=search_query,
             )
 
             if response.status_code != 200:
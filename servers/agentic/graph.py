@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Literal, Optional
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import ToolNode
+
+
+logger = logging.getLogger(__name__)
+
+
+# Concurrency slots of the agent step being run; the calls gathered by ToolNode inherit them
+_step_slots: ContextVar[Optional[asyncio.Semaphore]] = ContextVar("step_slots", default=None)
+
+
+def tool_error_message(e: Exception) -> str:
+    """Tool errors are reported to the LLM so it can fix its call"""
+    logger.error(f"Tool call failed: {e!r}")
+    return f"Error: {e!r}\n Please fix your mistakes."
+
+
+class ParallelToolNode(ToolNode):
+    """
+    Tools node for create_react_agent. Like ToolNode it runs the tool calls of an agent step
+    concurrently, so the step takes as long as its slowest tool, but at most max_concurrency
+    calls of a step run at a time, and a call exceeding its timeout (timeouts by tool name,
+    default_timeout otherwise) is answered with an error ToolMessage instead of holding up the step.
+    """
+
+    def __init__(self, tools: List[BaseTool], max_concurrency: int, default_timeout: float, timeouts: Optional[Dict[str, float]] = None):
+        super().__init__(tools, handle_tool_errors=tool_error_message)
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+
+    async def _afunc(self, input: Any, config: RunnableConfig, *, store: Any) -> Any:
+        _step_slots.set(asyncio.Semaphore(self.max_concurrency))
+        return await super()._afunc(input, config, store=store)
+
+    async def _arun_one(self, call: ToolCall, input_type: Literal["list", "dict", "tool_calls"], config: RunnableConfig) -> ToolMessage:
+        name = call["name"]
+        timeout = self.timeouts.get(name, self.default_timeout)
+        slots = _step_slots.get() or asyncio.Semaphore(self.max_concurrency)
+        async with slots:
+            try:
+                return await asyncio.wait_for(super()._arun_one(call, input_type, config), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {name} timed out after {timeout:.0f} s")
+                return ToolMessage(
+                    content=f"Error: {name} did not finish within {timeout:.0f} seconds, try a narrower request.",
+                    name=name,
+                    tool_call_id=call["id"],
+                    status="error",
+                )
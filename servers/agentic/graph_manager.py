@@ -1,3 +1,6 @@
+import logging
+import time
+
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver, AsyncConnectionPool
 from langgraph.prebuilt import create_react_agent
 from langgraph.graph.state import CompiledGraph
@@ -7,38 +10,79 @@ from agentic.agents.code_wizard.code_wizard import (
     code_wizard_tools,
     CODE_WIZARD_SYSTEM_PROMPT,
 )
+from agentic.graph import ParallelToolNode
 from agentic.llm import llm
 
 
+logger = logging.getLogger(__name__)
+
+
 # State manager for langgraph graph
 class AsyncGraphManager:
+    """
+    Owns the checkpointer connection pool and the compiled graph. Meant to be entered once
+    per process (see graph_manager below) and shared by every connection and request:
+    the graph and checkpointer are safe for concurrent runs on different threads.
+    """
+
     def __init__(self):
         self._graph = None
         self._postgres_saver = None
         self._postgres_connection_pool = None
 
     async def __aenter__(self) -> 'AsyncGraphManager':
+        checkpointer_settings = settings.checkpointer
+        started_at = time.perf_counter()
         # AsyncPostgresSaver is responsible for saving the graph state to the PostgreSQL database for ecah user.
-        self._postgres_connection_pool = await AsyncConnectionPool(conninfo=settings.checkpointer.POSGRES_CONNECTION_STRING, kwargs={"autocommit": True}).__aenter__()
+        self._postgres_connection_pool = AsyncConnectionPool(
+            conninfo=checkpointer_settings.POSGRES_CONNECTION_STRING,
+            min_size=checkpointer_settings.POOL_MIN_SIZE,
+            max_size=checkpointer_settings.POOL_MAX_SIZE,
+            timeout=checkpointer_settings.POOL_TIMEOUT,
+            kwargs={"autocommit": True},
+            # Connections dropped by Postgres or a proxy are replaced instead of failing a request
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+        )
+        await self._postgres_connection_pool.open(wait=True)
+        pool_opened_at = time.perf_counter()
+
         self._postgres_saver = AsyncPostgresSaver(self._postgres_connection_pool)
+        # Creates and migrates the checkpointer tables
         await self._postgres_saver.setup()
+        setup_done_at = time.perf_counter()
+
         self._graph: CompiledGraph = create_react_agent(
             model=llm,
-            tools=code_wizard_tools,
+            tools=ParallelToolNode(
+                code_wizard_tools,
+                max_concurrency=settings.agent.TOOL_CONCURRENCY,
+                default_timeout=settings.agent.TOOL_TIMEOUT,
+                timeouts=settings.agent.TOOL_TIMEOUTS,
+            ),
             prompt=CODE_WIZARD_SYSTEM_PROMPT,
             checkpointer=self._postgres_saver,
         )
+        logger.info(
+            f"Graph manager ready in {(time.perf_counter() - started_at) * 1000:.0f} ms: "
+            f"pool of {checkpointer_settings.POOL_MIN_SIZE}-{checkpointer_settings.POOL_MAX_SIZE} connections opened in "
+            f"{(pool_opened_at - started_at) * 1000:.0f} ms, checkpointer setup in {(setup_done_at - pool_opened_at) * 1000:.0f} ms"
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._postgres_saver and self._postgres_connection_pool:
-            await self._postgres_connection_pool.__aexit__(exc_type, exc_val, exc_tb)
+            await self._postgres_connection_pool.close()
             self._postgres_connection_pool = None
             self._postgres_saver = None
+            self._graph = None
 
     @property
     def graph(self) -> CompiledGraph:
         if not self._graph:
             raise RuntimeError("Graph not initialized. Use 'async with' context manager.")
         return self._graph
-            
\ No newline at end of file
+
+
+# Process-wide graph manager, entered once on server startup
+graph_manager = AsyncGraphManager()
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel
+
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteToolResultStore:
+    """Persistent tool results, so a restarted server keeps its warm cache"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.execute("DELETE FROM tool_results WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires_at, result FROM tool_results WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return row
+
+    def set(self, key: str, result: str, expires_at: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO tool_results (key, result, expires_at) VALUES (?, ?, ?)",
+                (key, result, expires_at),
+            )
+
+
+class CorpusVersion:
+    """
+    Version of the indexed corpus reported by the search API (/index/version). It is part of
+    the cache keys of corpus tools, so reindexing a repository at a new commit retires their results.
+    """
+
+    def __init__(self, url: str, refresh_interval: float):
+        self._url = url
+        self._refresh_interval = refresh_interval
+        self._version = ""
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> str:
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self._refresh_interval:
+            return self._version
+        async with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at >= self._refresh_interval:
+                try:
+                    async with httpx.AsyncClient(timeout=5.0) as client:
+                        response = await client.get(self._url)
+                        response.raise_for_status()
+                    self._version = response.json()["version"]
+                except Exception as e:
+                    # Keep serving with the last known version while the search API is unreachable
+                    logger.warning(f"Could not get the corpus version: {e}")
+                self._checked_at = time.monotonic()
+        return self._version
+
+
+class ToolResultCache:
+    """
+    Bounded in-process LRU cache of tool results with per-entry expiry, optionally backed by
+    a persistent store consulted on local misses. Hit rates are logged per tool.
+    """
+
+    def __init__(self, max_size: int, store: Optional[SqliteToolResultStore] = None, log_every: int = 100):
+        self._max_size = max_size
+        self._store = store
+        self._log_every = log_every
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "store_hits": 0, "misses": 0})
+
+    async def get(self, tool_name: str, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None and self._store is not None:
+            entry = await asyncio.to_thread(self._store.get, key)
+            if entry is not None:
+                self._remember(key, entry)
+                self._count(tool_name, "store_hits")
+                return entry[1]
+        if entry is None:
+            self._count(tool_name, "misses")
+            return None
+        self._entries.move_to_end(key)
+        self._count(tool_name, "hits")
+        return entry[1]
+
+    async def set(self, key: str, result: str, ttl: float):
+        expires_at = time.time() + ttl
+        self._remember(key, (expires_at, result))
+        if self._store is not None:
+            await asyncio.to_thread(self._store.set, key, result, expires_at)
+
+    def _remember(self, key: str, entry: Tuple[float, str]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _count(self, tool_name: str, outcome: str):
+        stats = self.stats[tool_name]
+        stats[outcome] += 1
+        lookups = sum(stats.values())
+        if self._log_every and lookups % self._log_every == 0:
+            hit_rate = (stats["hits"] + stats["store_hits"]) / lookups
+            logger.info(
+                f"Tool cache {tool_name}: hit rate {hit_rate:.0%} over {lookups} calls "
+                f"({stats['hits']} memory, {stats['store_hits']} persistent, {stats['misses']} misses)"
+            )
+
+
+def cache_key(tool_name: str, arguments: Dict[str, Any], corpus_version: str) -> str:
+    payload = json.dumps({"tool": tool_name, "arguments": arguments, "corpus": corpus_version}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_tool(tool: StructuredTool, cache: ToolResultCache, ttl: float, corpus_version: Optional[CorpusVersion] = None) -> StructuredTool:
+    """
+    The same tool with its results cached for ttl seconds. Results of tools over the indexed
+    corpus (corpus_version given) are also keyed by its version. Error results are not cached.
+    """
+    async def run_cached(**arguments) -> str:
+        version = await corpus_version.get() if corpus_version is not None else ""
+        # Key by the arguments with their defaults filled in, so omitting an argument and passing its default share an entry
+        key_arguments = arguments
+        if isinstance(tool.args_schema, type) and issubclass(tool.args_schema, BaseModel):
+            key_arguments = tool.args_schema(**arguments).model_dump()
+        key = cache_key(tool.name, key_arguments, version)
+        result = await cache.get(tool.name, key)
+        if result is not None:
+            return result
+        result = await tool.coroutine(**arguments)
+        # Tools report failures as "Error..." strings instead of raising
+        if isinstance(result, str) and not result.startswith("Error"):
+            await cache.set(key, result, ttl)
+        return result
+
+    return StructuredTool.from_function(
+        coroutine=run_cached,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
+
+
+def cache_tools(tools: Iterable[StructuredTool]) -> List[StructuredTool]:
+    """Wrap the tools with the process-wide result cache configured in settings.tool_cache"""
+    cache_settings = settings.tool_cache
+    if not cache_settings.ENABLED:
+        return list(tools)
+
+    store = SqliteToolResultStore(cache_settings.PATH) if cache_settings.PATH else None
+    cache = ToolResultCache(cache_settings.MAX_SIZE, store, cache_settings.LOG_EVERY)
+    corpus_version = CorpusVersion(f"{settings.code_search.SEARCH_API_URL}/index/version", cache_settings.VERSION_REFRESH_INTERVAL)
+    return [
+        cached_tool(
+            tool,
+            cache,
+            ttl=cache_settings.TTLS.get(tool.name, cache_settings.DEFAULT_TTL),
+            corpus_version=corpus_version if tool.name in cache_settings.VERSIONED_TOOLS else None,
+        )
+        for tool in tools
+    ]
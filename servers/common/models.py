@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 from mcp import types
 
@@ -8,6 +10,12 @@ class UserRequest(BaseModel):
     repositories: list[str]
 
 
+class CancelRequest(BaseModel):
+    """Stops the runs of the conversation with this id: {"id": "...", "cancel": true}"""
+    id: str
+    cancel: Literal[True]
+
+
 class ProBaseModel(BaseModel):
     @classmethod
     def from_text_content(cls, text_content: types.TextContent):
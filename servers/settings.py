@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -35,6 +35,9 @@ class CheckpointerSettings(BaseSettings):
         POSTGRES_DB (str): PostgreSQL database name. Default is "graph_memory".
         POSTGRES_USER (str): PostgreSQL user.
         POSTGRES_PASSWORD (str): PostgreSQL password.
+        POOL_MIN_SIZE (int): Connections the shared pool keeps open. Default is 2.
+        POOL_MAX_SIZE (int): Upper bound of connections of the shared pool. Default is 10.
+        POOL_TIMEOUT (float): Seconds to wait for a free connection. Default is 30.
         DB_URI (property): Constructed PostgreSQL connection string.
     """
 
@@ -47,6 +50,9 @@ class CheckpointerSettings(BaseSettings):
     POSTGRES_DB: str = "checkpointer"
     POSTGRES_USER: str = "checkpointer"
     POSTGRES_PASSWORD: str
+    POOL_MIN_SIZE: int = 2
+    POOL_MAX_SIZE: int = 10
+    POOL_TIMEOUT: float = 30.0
 
     @property
     def POSGRES_CONNECTION_STRING(self) -> str:
@@ -57,15 +63,94 @@ class CheckpointerSettings(BaseSettings):
 class CodeSearchSettings(BaseSettings):
     SEARCH_API_URL: str = "http://localhost:8000"
     SOURCEBOT_URL: str = "http://localhost:3000"
+    # SemanticSearch calls started within this window are sent as one /search/batch request (0 disables batching)
+    SEMANTIC_SEARCH_BATCH_WINDOW_MS: float = 10.0
+    # Search API ranking for SemanticSearch: "vector", or "hybrid" to also match exact identifiers (empty uses the API default)
+    SEMANTIC_SEARCH_MODE: str = ""
+    # Snippets returned per SemanticSearch call; lower it when the search API reranks its candidates
+    SEMANTIC_SEARCH_TOP_N: int = 10
 
     model_config = SettingsConfigDict(
         env_file=".env", extra="ignore"
     )
 
+class AgentSettings(BaseSettings):
+    """
+    Class for storing agent tool execution settings
+
+    Attributes:
+        TOOL_CONCURRENCY (int): Tool calls of one agent step that run at the same time. Default is 4.
+        TOOL_TIMEOUT (float): Seconds a tool call may take before it is answered with an error. Default is 60.
+        TOOL_TIMEOUTS (Dict[str, float]): Timeouts of individual tools by name as JSON,
+            e.g. {"InspectCode": 20}. Default is empty.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="AGENT_", env_file=".env", extra="ignore"
+    )
+
+    TOOL_CONCURRENCY: int = 4
+    TOOL_TIMEOUT: float = 60.0
+    TOOL_TIMEOUTS: Dict[str, float] = {}
+
+class ToolCacheSettings(BaseSettings):
+    """
+    Class for storing agent tool result cache settings
+
+    Attributes:
+        ENABLED (bool): Cache tool results across conversations. Default is True.
+        MAX_SIZE (int): Results kept in memory, least recently used are evicted first. Default is 1024.
+        PATH (str): SQLite file that keeps results across restarts, empty keeps them in memory only. Default is "".
+        DEFAULT_TTL (float): Seconds a result is reused. Default is 300.
+        TTLS (Dict[str, float]): TTLs of individual tools by name as JSON.
+        VERSIONED_TOOLS (List[str]): Tools over the indexed corpus; their results are dropped
+            when the search API reports a new corpus version. Default is ExactSearch and SemanticSearch.
+        VERSION_REFRESH_INTERVAL (float): Seconds between corpus version checks. Default is 60.
+        LOG_EVERY (int): Log the hit rate of a tool every this many calls, 0 disables. Default is 100.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="TOOL_CACHE_", env_file=".env", extra="ignore"
+    )
+
+    ENABLED: bool = True
+    MAX_SIZE: int = 1024
+    PATH: str = ""
+    DEFAULT_TTL: float = 300.0
+    # GitHub files change with every push, search results only when the corpus is reindexed
+    TTLS: Dict[str, float] = {"InspectCode": 600.0, "ExactSearch": 1800.0, "SemanticSearch": 1800.0}
+    VERSIONED_TOOLS: List[str] = ["ExactSearch", "SemanticSearch"]
+    VERSION_REFRESH_INTERVAL: float = 60.0
+    LOG_EVERY: int = 100
+
+class WebsocketSettings(BaseSettings):
+    """
+    Class for storing websocket server settings
+
+    Attributes:
+        MAX_CONCURRENT_RUNS (int): Agent runs one connection may have active at a time,
+            further messages wait for a free run. Default is 4.
+        MAX_PENDING_RUNS (int): Agent runs one connection may have active or waiting,
+            further messages are rejected with an error. Default is 16.
+        DELTA_WINDOW_MS (float): Answer tokens arriving within this window are sent as one
+            `delta` frame, 0 sends every token on its own. Default is 50.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="WEBSOCKET_", env_file=".env", extra="ignore"
+    )
+
+    MAX_CONCURRENT_RUNS: int = 4
+    MAX_PENDING_RUNS: int = 16
+    DELTA_WINDOW_MS: float = 50.0
+
 class Settings(BaseSettings):
     llm: LLMSettings = LLMSettings()
     checkpointer: CheckpointerSettings = CheckpointerSettings()
     code_search: CodeSearchSettings = CodeSearchSettings()
+    agent: AgentSettings = AgentSettings()
+    tool_cache: ToolCacheSettings = ToolCacheSettings()
+    websocket: WebsocketSettings = WebsocketSettings()
 
 
 settings = Settings()
@@ -2,13 +2,18 @@ import argparse
 import asyncio
 import json
 import logging
+import time
+from typing import Dict, List, Optional, Set
+
 import websockets
+from websockets.exceptions import ConnectionClosed
 
 from pydantic_core import ValidationError
 
-from agentic.graph_manager import AsyncGraphManager
-from common.models import UserRequest
-from langchain_core.messages import AIMessage, ToolMessage
+from agentic.graph_manager import graph_manager
+from common.models import CancelRequest, UserRequest
+from settings import settings
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 
 # Configure logging
 logging.basicConfig(
@@ -18,103 +23,273 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def conversation(websocket):
-    async with AsyncGraphManager() as graph_manager:
-        async for user_message in websocket:
-            try:
-                logger.info(f"Received message: {user_message}")
-                try:
-                    UserRequest.model_validate_json(user_message)
-                except ValidationError as e:
-                    error_msg = f"JSON serialization error: {e}"
-                    logger.error(error_msg)
+class DeltaStream:
+    """
+    Sends the tokens of an answer as `delta` frames while the LLM generates it. The first token
+    goes out at once; later tokens are coalesced into at most one frame per window.
+    """
+
+    def __init__(self, websocket, request_id: str, window: float):
+        self._websocket = websocket
+        self._request_id = request_id
+        self._window = window
+        self._parts: List[str] = []
+        self._sent_at: Optional[float] = None
+
+    async def add(self, text: str):
+        self._parts.append(text)
+        if self._sent_at is None or time.monotonic() - self._sent_at >= self._window:
+            await self.flush()
+
+    async def flush(self):
+        if not self._parts:
+            return
+        delta = "".join(self._parts)
+        self._parts = []
+        self._sent_at = time.monotonic()
+        await self._websocket.send(
+            json.dumps(
+                {
+                    "delta": delta,
+                    "id": self._request_id,
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+async def process_message(websocket, request: UserRequest, user_message: str):
+    """
+    Run the agent on one user message, sending its states and the answer to the client.
+    Text generated by the agent is streamed as `delta` frames ahead of the `state` or final
+    `message` frame that follows it.
+    """
+    try:
+        config = {"configurable": {"thread_id": request.id}}
+        inputs = {"messages": [("user", user_message)]}
+        logger.debug(f"Processing input with config: {config}")
+        deltas = DeltaStream(websocket, request.id, settings.websocket.DELTA_WINDOW_MS / 1000)
+        
+        async for stream_mode, event in graph_manager.graph.astream(
+            input=inputs, config=config, stream_mode=["values", "messages"]
+        ):
+            if stream_mode == "messages":
+                # Tokens of the LLM call of the agent node, tool call arguments have no content
+                chunk, metadata = event
+                if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content \
+                        and metadata.get("langgraph_node") == "agent":
+                    await deltas.add(chunk.content)
+                continue
+            # The state or message frame of this step follows the last of its deltas
+            await deltas.flush()
+
+            messages = event["messages"]
+            message = messages[-1]
+            logger.info(f"message: {message}")
+            if isinstance(message, tuple):
+                logger.debug(f"Received tuple message: {message}")
+            else:
+                logger.debug(f"Received message of type {type(message).__name__}")
+
+            # Проверяем тип сообщения
+            if isinstance(message, AIMessage):
+                # Проверяем, содержит ли AIMessage вызовы инструментов
+                if hasattr(message, 'tool_calls') and message.tool_calls:
+                    # У AIMessage есть вызовы инструментов, отправляем состояние
+                    state = ""
+                    for tool_call in message.tool_calls:
+                        tool_name = tool_call["name"]
+                        if tool_name == "InspectCode":
+                            state = "Проверяю файлы"
+                            break  # Берем первый инструмент, если их несколько
+                        elif tool_name == "SemanticSearch":
+                            state = "Использую семантический поиск"
+                            break
+                        elif tool_name == "ExactSearch":
+                            state = "Ищу файлы по индексу"
+                            break
+                    
+                    logger.info(f"Sending state: {state} for message ID: {request.id}")
+                    # Отправляем сообщение о состоянии
                     await websocket.send(
                         json.dumps(
                             {
-                                "Error": error_msg
+                                "state": state,
+                                "id": request.id,
                             },
                             ensure_ascii=False,
                         )
                     )
-                    continue
-
-                user_message_json = json.loads(user_message)
-                config = {"configurable": {"thread_id": user_message_json["id"]}}
-                inputs = {"messages": [("user", user_message)]}
-                logger.debug(f"Processing input with config: {config}")
-                
-                async for event in graph_manager.graph.astream(
-                    input=inputs, config=config, stream_mode="values"
-                ):
-                    messages = event["messages"]
-                    message = messages[-1]
-                    logger.info(f"message: {message}")
-                    if isinstance(message, tuple):
-                        logger.debug(f"Received tuple message: {message}")
-                    else:
-                        logger.debug(f"Received message of type {type(message).__name__}")
-
-                    # Проверяем тип сообщения
-                    if isinstance(message, AIMessage):
-                        # Проверяем, содержит ли AIMessage вызовы инструментов
-                        if hasattr(message, 'tool_calls') and message.tool_calls:
-                            # У AIMessage есть вызовы инструментов, отправляем состояние
-                            state = ""
-                            for tool_call in message.tool_calls:
-                                tool_name = tool_call["name"]
-                                if tool_name == "InspectCode":
-                                    state = "Проверяю файлы"
-                                    break  # Берем первый инструмент, если их несколько
-                                elif tool_name == "SemanticSearch":
-                                    state = "Использую семантический поиск"
-                                    break
-                                elif tool_name == "ExactSearch":
-                                    state = "Ищу файлы по индексу"
-                                    break
-                            
-                            logger.info(f"Sending state: {state} for message ID: {user_message_json['id']}")
-                            # Отправляем сообщение о состоянии
-                            await websocket.send(
-                                json.dumps(
-                                    {
-                                        "state": state,
-                                        "id": user_message_json["id"],
-                                    },
-                                    ensure_ascii=False,
-                                )
-                            )
-                        else:
-                            # У AIMessage нет вызовов инструментов, отправляем только содержимое сообщения
-                            logger.info(f"Sending AI message content for message ID: {user_message_json['id']}")
-                            await websocket.send(
-                                json.dumps(
-                                    {
-                                        "message": message.content,
-                                        "id": user_message_json["id"],
-                                    },
-                                    ensure_ascii=False,
-                                )
-                            )
-                    else:
-                        # Если сообщение не AIMessage (например, ToolMessage),
-                        logger.debug(f"Skipping non-AIMessage of type: {type(message).__name__}")
-                        pass
-            except Exception as e:
-                logger.exception(f"Error processing message: {e}")
+                else:
+                    # У AIMessage нет вызовов инструментов, отправляем только содержимое сообщения
+                    logger.info(f"Sending AI message content for message ID: {request.id}")
+                    await websocket.send(
+                        json.dumps(
+                            {
+                                "message": message.content,
+                                "id": request.id,
+                            },
+                            ensure_ascii=False,
+                        )
+                    )
+            else:
+                # Если сообщение не AIMessage (например, ToolMessage),
+                logger.debug(f"Skipping non-AIMessage of type: {type(message).__name__}")
+                pass
+    except Exception as e:
+        logger.exception(f"Error processing message: {e}")
+        await websocket.send(
+            json.dumps(
+                {
+                    "Error": str(e),
+                    "id": request.id,
+                }
+            )
+        )
+
+
+async def close_pending_tool_calls(thread_id: str):
+    """
+    Answer the tool calls left without results by a run cancelled in its tools step, so the
+    thread does not end in an AIMessage with unanswered tool_calls, which the LLM API rejects.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    try:
+        snapshot = await graph_manager.graph.aget_state(config)
+        messages = snapshot.values.get("messages", [])
+        if not messages or not isinstance(messages[-1], AIMessage) or not messages[-1].tool_calls:
+            return
+        cancelled = [
+            ToolMessage(
+                content="Error: the tool call was cancelled by the user.",
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
+            for tool_call in messages[-1].tool_calls
+        ]
+        await graph_manager.graph.aupdate_state(config, {"messages": cancelled}, as_node="tools")
+        logger.info(f"Closed {len(cancelled)} cancelled tool calls of message ID {thread_id}")
+    except Exception as e:
+        logger.exception(f"Could not close cancelled tool calls of message ID {thread_id}: {e}")
+
+
+class ConversationRuns:
+    """
+    Agent runs of one websocket connection. Every message runs as its own task, so one
+    connection can multiplex several conversations; messages of the same thread id still
+    run one after another, and at most MAX_CONCURRENT_RUNS runs are active at a time.
+    At most MAX_PENDING_RUNS runs may be active or waiting, further messages are rejected.
+    """
+
+    def __init__(self, websocket, max_concurrent_runs: int, max_pending_runs: int):
+        self._websocket = websocket
+        self._slots = asyncio.Semaphore(max_concurrent_runs)
+        self._max_pending_runs = max_pending_runs
+        self._thread_locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+
+    def start(self, request: UserRequest, user_message: str) -> bool:
+        """Start a run of the message; returns False if the connection has too many runs already"""
+        if sum(len(tasks) for tasks in self._tasks.values()) >= self._max_pending_runs:
+            return False
+        task = asyncio.create_task(self._run(request, user_message))
+        self._tasks.setdefault(request.id, set()).add(task)
+        task.add_done_callback(lambda task: self._forget(request.id, task))
+        return True
+
+    def cancel(self, thread_id: str) -> int:
+        """Cancel the running and waiting runs of a thread id"""
+        tasks = self._tasks.get(thread_id, set())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def cancel_all(self):
+        tasks = [task for thread_tasks in self._tasks.values() for task in thread_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, request: UserRequest, user_message: str):
+        # The thread lock is taken before a slot, so a queued message of a busy thread does not hold a slot
+        lock = self._thread_locks.setdefault(request.id, asyncio.Lock())
+        try:
+            async with lock, self._slots:
+                try:
+                    await process_message(self._websocket, request, user_message)
+                except asyncio.CancelledError:
+                    # Repaired under the thread lock, before the next message of the thread runs
+                    await asyncio.shield(close_pending_tool_calls(request.id))
+                    raise
+        except ConnectionClosed:
+            logger.info(f"Connection closed while answering message ID {request.id}")
+
+    def _forget(self, thread_id: str, task: asyncio.Task):
+        tasks = self._tasks.get(thread_id)
+        if tasks is None:
+            return
+        tasks.discard(task)
+        if not tasks:
+            del self._tasks[thread_id]
+            self._thread_locks.pop(thread_id, None)
+
+
+async def conversation(websocket):
+    runs = ConversationRuns(websocket, settings.websocket.MAX_CONCURRENT_RUNS, settings.websocket.MAX_PENDING_RUNS)
+    try:
+        async for user_message in websocket:
+            logger.info(f"Received message: {user_message}")
+            try:
+                cancel_request = CancelRequest.model_validate_json(user_message)
+            except ValidationError:
+                cancel_request = None
+            if cancel_request is not None:
+                cancelled = runs.cancel(cancel_request.id)
+                logger.info(f"Cancelled {cancelled} runs for message ID {cancel_request.id}")
+                await websocket.send(json.dumps({"cancelled": True, "id": cancel_request.id}))
+                continue
+
+            try:
+                request = UserRequest.model_validate_json(user_message)
+            except ValidationError as e:
+                error_msg = f"JSON serialization error: {e}"
+                logger.error(error_msg)
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "Error": error_msg
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+                continue
+
+            if not runs.start(request, user_message):
+                logger.warning(f"Rejected message ID {request.id}: too many messages in progress")
                 await websocket.send(
                     json.dumps(
                         {
-                            "Error": str(e)
-                        }
+                            "Error": "Too many messages in progress, wait for an answer before sending more",
+                            "id": request.id,
+                        },
+                        ensure_ascii=False,
                     )
                 )
+    except ConnectionClosed:
+        pass
+    finally:
+        # Nobody is left to read the answers of a closed connection
+        await runs.cancel_all()
 
 
 async def main(host: str, port: int):
     logger.info(f"Starting server on ws://{host}:{port}")
-    async with websockets.serve(conversation, host, port) as server:
-        logger.info(f"Server running on ws://{host}:{port}")
-        await server.serve_forever()
+    # One graph manager and connection pool for every connection of the process
+    async with graph_manager:
+        async with websockets.serve(conversation, host, port) as server:
+            logger.info(f"Server running on ws://{host}:{port}")
+            await server.serve_forever()
 
 
 if __name__ == "__main__":